@@ -0,0 +1,153 @@
+#!/bin/false
+# This is a library.
+
+"""
+Admission control in front of `GameState.call_guess`.
+
+Every guess costs a timer reset and (usually) an outgoing "sorry, wrong"
+message, so a single spammer could keep us busy all day.  `Admission`
+drops guesses before they reach the game if:
+
+- the player is out of tokens (each player has their own bucket per chat),
+- the chat is out of tokens (so a whole chat of spammers can't hog us), or
+- the exact same guess (after folding) was already made in this game.
+
+The player bucket is checked first, so a spammer only ever burns their own
+tokens, and can't starve the other players of their chat.
+
+>>> import hangchat
+>>> g = hangchat.GameFactory(['ahoy']).start(None, hangchat.DummyCallbacks(), ['Anton', 'Berta'])
+>>> adm = Admission(player_burst=2, clock=lambda: 0)
+>>> [adm.admit('chat', 'Anton', g, w) for w in ['cool', 'COOL', 'hell', 'cody']]
+[True, False, True, False]
+>>> adm.stats['shed_repeat'], adm.stats['shed_player']
+(1, 1)
+"""
+
+import collections
+import time
+import weakref
+
+DEFAULT_PLAYER_RATE = 0.5  # guesses per second
+DEFAULT_PLAYER_BURST = 5
+DEFAULT_CHAT_RATE = 5.0
+DEFAULT_CHAT_BURST = 30
+DEFAULT_SEEN_SIZE = 64
+# Every so many calls, forget buckets that are full anyway.
+PRUNE_INTERVAL = 10_000
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, rate, burst, now):
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def take(self, rate, burst, now):
+        self.refill(rate, burst, now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class SeenGuesses:
+    """
+    The last `size` distinct guesses of a game.
+    """
+
+    def __init__(self, size):
+        self.order = collections.deque()
+        self.guesses = set()
+        self.size = size
+
+    def __contains__(self, guess):
+        return guess in self.guesses
+
+    def add(self, guess):
+        if len(self.order) >= self.size:
+            self.guesses.discard(self.order.popleft())
+        self.order.append(guess)
+        self.guesses.add(guess)
+
+
+class Admission:
+    def __init__(self, player_rate=DEFAULT_PLAYER_RATE, player_burst=DEFAULT_PLAYER_BURST,
+                 chat_rate=DEFAULT_CHAT_RATE, chat_burst=DEFAULT_CHAT_BURST,
+                 seen_size=DEFAULT_SEEN_SIZE, clock=time.monotonic):
+        self.player_rate = player_rate
+        self.player_burst = player_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.seen_size = seen_size
+        self.clock = clock
+        # (chat_id, player) -> TokenBucket
+        self.player_buckets = dict()
+        # chat_id -> TokenBucket
+        self.chat_buckets = dict()
+        # GameState -> SeenGuesses; goes away together with the game.
+        self.seen = weakref.WeakKeyDictionary()
+        # 'offered', 'admitted', 'shed_repeat', 'shed_player', 'shed_chat'
+        self.stats = collections.Counter()
+        self.calls_since_prune = 0
+
+    def admit(self, chat_id, player, game, guessed_word):
+        """
+        Returns whether `guessed_word` should be passed on to `game.call_guess`.
+        """
+        self.stats['offered'] += 1
+        self.calls_since_prune += 1
+        if self.calls_since_prune >= PRUNE_INTERVAL:
+            self.prune()
+        now = self.clock()
+
+        folded = game.normalizer.fold(guessed_word)
+        seen = self.seen.get(game)
+        if seen is not None and folded in seen:
+            self.stats['shed_repeat'] += 1
+            return False
+
+        bucket = self.player_buckets.get((chat_id, player))
+        if bucket is None:
+            bucket = self.player_buckets[(chat_id, player)] = TokenBucket(self.player_burst, now)
+        if not bucket.take(self.player_rate, self.player_burst, now):
+            self.stats['shed_player'] += 1
+            return False
+
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_burst, now)
+        if not bucket.take(self.chat_rate, self.chat_burst, now):
+            self.stats['shed_chat'] += 1
+            return False
+
+        if seen is None:
+            seen = self.seen[game] = SeenGuesses(self.seen_size)
+        seen.add(folded)
+        self.stats['admitted'] += 1
+        return True
+
+    def shed_count(self):
+        return self.stats['shed_repeat'] + self.stats['shed_player'] + self.stats['shed_chat']
+
+    def prune(self):
+        """
+        Forgets all buckets that are full again; they'd behave the same as
+        fresh ones.  Keeps memory bounded by the number of active players.
+        """
+        self.calls_since_prune = 0
+        now = self.clock()
+        for buckets, rate, burst in [(self.player_buckets, self.player_rate, self.player_burst),
+                                     (self.chat_buckets, self.chat_rate, self.chat_burst)]:
+            full = []
+            for key, bucket in buckets.items():
+                bucket.refill(rate, burst, now)
+                if bucket.tokens >= burst:
+                    full.append(key)
+            for key in full:
+                del buckets[key]
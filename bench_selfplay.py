@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+"""
+Self-play load test: lets `solver` players play lots of games on one core
+and reports the throughput.
+
+Usage: ./bench_selfplay.py [DICTIONARY] [--games N] [--players N]
+
+Without a DICTIONARY, a synthetic one with 500k words is generated.
+"""
+
+import argparse
+import random
+import string
+import time
+
+import hangchat
+import solver
+
+
+def synthetic_words(n_words, rng):
+    return [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 14)))
+            for _ in range(n_words)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('dictionary', nargs='?')
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--words', type=int, default=500_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.dictionary is None:
+        factory = hangchat.GameFactory(synthetic_words(args.words, rng))
+    else:
+        factory = hangchat.GameFactory(hangchat.read_cleaned_dict(args.dictionary))
+
+    begin = time.perf_counter()
+    index = solver.SolverIndex.from_factory(factory)
+    print('Index of {} words built in {:.2f} s'.format(len(index), time.perf_counter() - begin))
+
+    players = list(range(args.players))
+    callbacks = solver.SolverCallbacks(index, players, rng)
+    solved = 0
+    begin = time.perf_counter()
+    for _ in range(args.games):
+        callbacks.reset()
+        game = factory.start(None, callbacks, players)
+        solver.play_out(game, callbacks)
+        solved += callbacks.winner is not None
+    elapsed = time.perf_counter() - begin
+
+    print('{} games with {} solvers each in {:.2f} s: {:.0f} games/s, {:.0f} player-games/s, {:.1%} solved'.format(
+        args.games, args.players, elapsed, args.games / elapsed, args.games * args.players / elapsed,
+        solved / args.games))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""
+Measures how long the bot takes from process start until it could answer
+its first update, and until the dictionary is usable.  Runs everything
+twice: once with a cold dictionary cache, once with a warm one.
+
+Usage: ./bench_startup.py [DICTIONARY] [--runs N]
+
+Without a DICTIONARY, a synthetic one with 500k words is generated.
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = r'''
+import sys, time, json
+stamps = {}
+import telegram_bot
+stamps['imported'] = time.monotonic()
+telegram_bot.load_dictionary({'dictionary': sys.argv[1], 'cache_dir': sys.argv[2]})
+try:
+    # Mirror `main()`, which imports this while the dictionary loads.
+    import telegram.ext
+except ImportError:
+    pass
+stamps['telegram'] = time.monotonic()
+
+class FakeMessage:
+    def reply_text(self, text):
+        stamps['first_response'] = time.monotonic()
+
+class FakeUpdate:
+    message = FakeMessage()
+
+telegram_bot.start(FakeUpdate(), None)
+factory = telegram_bot.dictionary.factory()
+stamps['dictionary'] = time.monotonic()
+import hangchat
+factory.start(None, hangchat.DummyCallbacks(), ['Anton', 'Berta'])
+stamps['first_game'] = time.monotonic()
+print(json.dumps(stamps))
+'''
+
+
+def make_dictionary(path, n_words):
+    rng = random.Random(42)
+    with open(path, 'w') as fp:
+        for _ in range(n_words):
+            word = ''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(4, 14)))
+            fp.write(word + '\n')
+
+
+def run_once(dict_file, cache_dir):
+    here = os.path.dirname(os.path.abspath(__file__))
+    begin = time.monotonic()
+    output = subprocess.check_output([sys.executable, '-c', CHILD, dict_file, cache_dir], cwd=here)
+    # `time.monotonic` uses CLOCK_MONOTONIC, which is the same across processes.
+    stamps = json.loads(output.decode().splitlines()[-1])
+    return {k: (v - begin) * 1000 for k, v in stamps.items()}
+
+
+def report(label, runs):
+    keys = ['imported', 'telegram', 'first_response', 'dictionary', 'first_game']
+    print(label)
+    for key in keys:
+        values = sorted(r[key] for r in runs)
+        print('    {:<16} median {:8.1f} ms   min {:8.1f} ms'.format(key, values[len(values) // 2], values[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('dictionary', nargs='?')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--words', type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dict_file = args.dictionary
+        if dict_file is None:
+            dict_file = os.path.join(tmp, 'words')
+            make_dictionary(dict_file, args.words)
+
+        cold = []
+        for i in range(args.runs):
+            cold.append(run_once(dict_file, os.path.join(tmp, 'cold-cache-{}'.format(i))))
+        warm_cache = os.path.join(tmp, 'warm-cache')
+        run_once(dict_file, warm_cache)
+        warm = [run_once(dict_file, warm_cache) for _ in range(args.runs)]
+
+    report('Cold cache:', cold)
+    report('Warm cache:', warm)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+#!/bin/false
+# This is a library.
+
+"""
+One countdown scheduler for everything: hangchat's hint timers, per-player
+turn timers, whatever else needs to happen "in N milliseconds".
+
+Instead of one job-queue job per game per turn, all timers live in a single
+min-heap, driven by a single thread.  Cancelling a timer only marks its heap
+entry as dead (lazy deletion), so cancel and reschedule are cheap.  Dead
+entries are dropped when they reach the top of the heap, and the heap is
+compacted whenever dead entries outnumber live ones.  So memory is bounded
+by the number of *live* timers, no matter how often they get rescheduled.
+
+>>> sched = CountdownScheduler(clock=lambda: now)
+>>> now = 0.0
+>>> t = sched.schedule(1500, print, 'ding')
+>>> sched.reschedule(t, 3000)
+True
+>>> now = 2.0
+>>> sched.run_pending()
+0
+>>> now = 3.0
+>>> sched.run_pending()
+ding
+1
+
+Rescheduling to the very same deadline is fine, too:
+
+>>> t = sched.schedule(1000, print, 'dong')
+>>> sched.reschedule(t, 1000)
+True
+>>> now = 4.0
+>>> sched.run_pending()
+dong
+1
+
+Without `start()`, nothing runs on its own, which is handy for tests and
+simulations with a virtual clock.  After `start()`, callbacks run on the
+driver thread, so they must do their own locking if they touch state that
+other threads touch, too.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+import hangchat
+
+logger = logging.getLogger(__name__)
+
+# Indices into a heap entry.  Entries are lists so that `cancel` can kill
+# them in place; comparison stops at the sequence number, which is unique
+# per entry (unlike the timer_id, which a rescheduled timer shares with its
+# dead entry), so the function never gets compared.
+_DEADLINE = 0
+_SEQ = 1
+_TIMER_ID = 2
+_FUNCTION = 3
+_ARGS = 4
+
+# Don't bother compacting tiny heaps.
+MIN_COMPACT_SIZE = 64
+
+
+class CountdownScheduler:
+    def __init__(self, clock=time.monotonic, on_lag=None):
+        """
+        clock: returns the current time in seconds.  Must be monotonic.
+        on_lag: if set, called with how many milliseconds late each timer
+            fired, e.g. `watchdog.LagHistogram.add`.
+        """
+        self.clock = clock
+        self.on_lag = on_lag
+        self.heap = []
+        self.live = dict()  # timer_id -> heap entry
+        self.dead = 0
+        self.ids = itertools.count(1)
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.thread = None
+        self.stopping = False
+
+    def __len__(self):
+        return len(self.live)
+
+    def schedule(self, milliseconds, function, *args):
+        """
+        Calls `function(*args)` in `milliseconds` milliseconds.
+        Returns a timer_id that is never reused.
+        """
+        with self.cond:
+            timer_id = next(self.ids)
+            self._push(timer_id, milliseconds, function, args)
+            return timer_id
+
+    def cancel(self, timer_id):
+        """
+        Returns whether the timer was still pending.
+        """
+        with self.cond:
+            entry = self.live.pop(timer_id, None)
+            if entry is None:
+                return False
+            self._kill(entry)
+            return True
+
+    def reschedule(self, timer_id, milliseconds):
+        """
+        Restarts a pending timer, keeping its ID.  Returns whether the timer
+        was still pending; if not, nothing happens.
+        """
+        with self.cond:
+            entry = self.live.get(timer_id)
+            if entry is None:
+                return False
+            function, args = entry[_FUNCTION], entry[_ARGS]
+            self._kill(entry)
+            self._push(timer_id, milliseconds, function, args)
+            return True
+
+    def next_deadline(self):
+        """
+        Returns the deadline of the next live timer, or `None`.
+        """
+        with self.cond:
+            self._drop_dead_top()
+            return self.heap[0][_DEADLINE] if self.heap else None
+
+    def run_pending(self, now=None):
+        """
+        Runs all timers that are due.  Returns how many ran.
+        """
+        ran = 0
+        while True:
+            with self.cond:
+                if now is None:
+                    now = self.clock()
+                self._drop_dead_top()
+                if not self.heap or self.heap[0][_DEADLINE] > now:
+                    return ran
+                entry = heapq.heappop(self.heap)
+                del self.live[entry[_TIMER_ID]]
+            if self.on_lag is not None:
+                self.on_lag((self.clock() - entry[_DEADLINE]) * 1000)
+            # Call without holding the lock, so the callback can (re)schedule.
+            try:
+                entry[_FUNCTION](*entry[_ARGS])
+            except Exception:
+                logger.exception('Timer %s failed', entry[_TIMER_ID])
+            ran += 1
+
+    def start(self):
+        assert self.thread is None
+        self.stopping = False
+        self.thread = threading.Thread(target=self._drive, name='countdown', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _push(self, timer_id, milliseconds, function, args):
+        entry = [self.clock() + milliseconds / 1000, next(self.seq), timer_id, function, args]
+        self.live[timer_id] = entry
+        heapq.heappush(self.heap, entry)
+        if self.heap[0] is entry:
+            # The driver may be sleeping for longer than it should.
+            self.cond.notify()
+
+    def _kill(self, entry):
+        entry[_FUNCTION] = None
+        entry[_ARGS] = None
+        self.dead += 1
+        if self.dead > MIN_COMPACT_SIZE and self.dead > len(self.live):
+            self.heap = [e for e in self.heap if e[_FUNCTION] is not None]
+            heapq.heapify(self.heap)
+            self.dead = 0
+
+    def _drop_dead_top(self):
+        while self.heap and self.heap[0][_FUNCTION] is None:
+            heapq.heappop(self.heap)
+            self.dead -= 1
+
+    def _drive(self):
+        while True:
+            with self.cond:
+                if self.stopping:
+                    return
+                self._drop_dead_top()
+                if self.heap:
+                    timeout = self.heap[0][_DEADLINE] - self.clock()
+                else:
+                    timeout = None
+                if timeout is None or timeout > 0:
+                    self.cond.wait(timeout)
+                    continue
+            self.run_pending()
+
+
+class ScheduledCallbacks(hangchat.AbstractCallbacks):
+    """
+    Implements the timer part of `AbstractCallbacks` with a shared
+    `CountdownScheduler`.  Subclasses implement `timer_fired`, which usually
+    looks up the game and calls `GameState.run_timer`.  Note that it runs on
+    the scheduler's thread, so it still needs the same lock that guesses
+    take.
+
+    A timer that gets removed after the scheduler already picked it, but
+    before it actually ran, is usually skipped.  But `remove_timer` can
+    still come in between the check and `timer_fired`, so `timer_fired`
+    may see a timer that was just removed.  `GameState.run_timer` ignores
+    such stale timers.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        # timer_id -> box, for all timers that haven't fired or been removed yet
+        self.boxes = dict()
+
+    def set_timer(self, game_id, milliseconds, action_data):
+        # The timer_id doesn't exist before the timer does, so pass a mutable
+        # box [timer_id, cancelled] and fill it in afterwards.  The
+        # condition's lock is reentrant, and holding it keeps the driver from
+        # firing before that.
+        box = [None, False]
+        with self.scheduler.cond:
+            timer_id = self.scheduler.schedule(milliseconds, self._fire, game_id, action_data, box)
+            box[0] = timer_id
+            self.boxes[timer_id] = box
+        return timer_id
+
+    def remove_timer(self, game_id, timer_id):
+        with self.scheduler.cond:
+            box = self.boxes.pop(timer_id, None)
+            if box is not None:
+                # Too late for `cancel` if `run_pending` already popped it.
+                box[1] = True
+            self.scheduler.cancel(timer_id)
+
+    def timer_fired(self, game_id, action_data, timer_id):
+        raise NotImplementedError()
+
+    def _fire(self, game_id, action_data, box):
+        with self.scheduler.cond:
+            if box[1]:
+                return
+            del self.boxes[box[0]]
+        self.timer_fired(game_id, action_data, box[0])
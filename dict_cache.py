@@ -0,0 +1,280 @@
+#!/bin/false
+# This is a library.
+
+"""
+Caches the cleaned dictionary, so that startup doesn't have to re-clean
+`/usr/share/dict/whatever` every single time.
+
+The cache is a plain text file: one header line that identifies the source
+file (by path, mtime and size) and the normalizer settings, then one
+cleaned word per line, then one folded word per line.  If the source or
+the settings change, the header won't match anymore and the cache gets
+rebuilt.  Reading it back is a single `read().split()`-ish pass, without
+calling `clean_word` or `Normalizer.fold` for every line.
+
+`DictionaryLoader` does all that in a background thread, so the bot can
+start handling updates while the dictionary is still loading.
+`DictionaryReloader` does the same later on, and then swaps the new
+dictionary into a running `GameFactory`.
+
+>>> import os, tempfile, hangchat
+>>> tmp = tempfile.TemporaryDirectory()
+>>> source = os.path.join(tmp.name, 'words.txt')
+>>> with open(source, 'w') as fp:
+...     _ = fp.write('Ahoy\\n# comment\\nStraße\\n')
+>>> cache_dir = os.path.join(tmp.name, 'cache')
+>>> read_cached_dict(source, cache_dir)
+(['ahoy', 'straße'], ['ahoy', 'strasse'])
+
+To tell a cache hit from a rebuild, replace the cached words behind its back:
+
+>>> cache_file = _cache_path(source, cache_dir)
+>>> def tamper():
+...     with open(cache_file, 'r') as fp:
+...         header = fp.readline()
+...     with open(cache_file, 'w') as fp:
+...         _ = fp.write(header + 'cached\\nfolded')
+>>> tamper()
+>>> read_cached_dict(source, cache_dir)
+(['cached'], ['folded'])
+
+Changing the source's mtime, its size, or the normalizer settings rebuilds it:
+
+>>> st = os.stat(source)
+>>> os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+>>> read_cached_dict(source, cache_dir)
+(['ahoy', 'straße'], ['ahoy', 'strasse'])
+>>> tamper()
+>>> st = os.stat(source)
+>>> with open(source, 'a') as fp:
+...     _ = fp.write('Cool\\n')
+>>> os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns))
+>>> read_cached_dict(source, cache_dir)
+(['ahoy', 'straße', 'cool'], ['ahoy', 'strasse', 'cool'])
+>>> tamper()
+>>> plain = hangchat.Normalizer(sharp_s=False, casefold=False)
+>>> read_cached_dict(source, cache_dir, plain)
+(['ahoy', 'straße', 'cool'], ['ahoy', 'straße', 'cool'])
+
+A truncated cache (e.g. the disk ran full) is ignored and rebuilt:
+
+>>> with open(cache_file, 'r') as fp:
+...     data = fp.read()
+>>> with open(cache_file, 'w') as fp:
+...     _ = fp.write(data[:data.rindex('\\n')])
+>>> read_cached_dict(source, cache_dir, plain)
+(['ahoy', 'straße', 'cool'], ['ahoy', 'straße', 'cool'])
+
+Loading in the background, and reloading later.  Difficulty settings
+survive the reload:
+
+>>> factory = DictionaryLoader(source, cache_dir, timeout_ms=5000).start().factory()
+>>> factory.word_list, factory.timeout_ms
+(['ahoy', 'straße', 'cool'], 5000)
+>>> factory.set_difficulty({'ahoy': 0.9}, max_difficulty=0.5)
+>>> with open(source, 'w') as fp:
+...     _ = fp.write('ahoy\\nhell\\n')
+>>> results = []
+>>> reloader = DictionaryReloader(factory)
+>>> reloader.reload(source, cache_dir, on_done=results.append)
+True
+>>> reloader.thread.join()
+>>> factory.word_list, factory.dictionary.eligible, results[0] is factory.dictionary
+(['ahoy', 'hell'], [1], True)
+>>> tmp.cleanup()
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import hangchat
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever `clean_word`, `Normalizer.fold` or the file format changes.
+CACHE_FORMAT = 4
+CACHE_MAGIC = 'hangchat-dict'
+# Folding happens in chunks of this size.  In between we yield the GIL, so
+# that a reload doesn't stall the threads that handle updates.
+FOLD_CHUNK = 10_000
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'hangchat')
+
+
+def _normalizer_key(normalizer):
+    return hashlib.sha256(repr(normalizer.args).encode()).hexdigest()[:16]
+
+
+def _cache_header(filename, normalizer):
+    st = os.stat(filename)
+    return '{} {} {} {} {} {}'.format(CACHE_MAGIC, CACHE_FORMAT, _normalizer_key(normalizer),
+                                      st.st_mtime_ns, st.st_size, os.path.abspath(filename))
+
+
+def _cache_path(filename, cache_dir):
+    key = hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, 'dict-{}.txt'.format(key))
+
+
+def _fold_all(words, normalizer):
+    fold = normalizer.fold
+    folded = []
+    for begin in range(0, len(words), FOLD_CHUNK):
+        folded.extend(map(fold, words[begin:begin + FOLD_CHUNK]))
+        time.sleep(0)
+    return folded
+
+
+def read_cached_dict(filename, cache_dir=None, normalizer=None):
+    """
+    Like `hangchat.read_cleaned_dict`, but uses (and maintains) a cache in
+    `cache_dir`.  Returns `(words, folded)`, where `folded` holds the
+    `normalizer.fold` of each word.  The cache also depends on the
+    normalizer's settings.  Failing to write the cache is not fatal; we just
+    log it and go on.
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    normalizer = normalizer or hangchat.DEFAULT_NORMALIZER
+    header = _cache_header(filename, normalizer)
+    cache_file = _cache_path(filename, cache_dir)
+
+    try:
+        with open(cache_file, 'r') as fp:
+            if fp.readline().rstrip('\n') == header:
+                # Words may contain spaces, but never newlines.  First all
+                # cleaned words, then all folded ones.
+                data = fp.read()
+                lines = data.split('\n') if data else []
+                half = len(lines) // 2
+                if len(lines) == 2 * half:
+                    return lines[:half], lines[half:]
+                logger.warning('Ignoring truncated dictionary cache %s', cache_file)
+    except FileNotFoundError:
+        pass
+    except (OSError, UnicodeDecodeError) as e:
+        logger.warning('Ignoring unreadable dictionary cache %s: %s', cache_file, e)
+
+    words = hangchat.read_cleaned_dict(filename)
+    folded = _fold_all(words, normalizer)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first, so that a concurrent reader (or a
+        # crash) never sees a half-written cache.
+        fd, tmp_name = tempfile.mkstemp(dir=cache_dir, prefix='.dict-')
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(header)
+            fp.write('\n')
+            fp.write('\n'.join(words + folded))
+        os.replace(tmp_name, cache_file)
+    except OSError as e:
+        logger.warning('Could not write dictionary cache %s: %s', cache_file, e)
+    return words, folded
+
+
+def build_dictionary(filename, cache_dir=None, normalizer=None, difficulty=None, max_difficulty=None):
+    """
+    Reads (and caches) the word list, and builds a `hangchat.Dictionary`
+    from it.  Meant to run in a background thread.
+    """
+    normalizer = normalizer or hangchat.DEFAULT_NORMALIZER
+    words, folded = read_cached_dict(filename, cache_dir, normalizer)
+    return hangchat.Dictionary(words, normalizer, cleaned=True, folded_list=folded,
+                               difficulty=difficulty, max_difficulty=max_difficulty)
+
+
+class DictionaryLoader:
+    """
+    Loads a dictionary in the background.  `factory()` blocks until it's
+    done, and then always returns the same `GameFactory`.
+    """
+
+    def __init__(self, filename, cache_dir=None, timeout_ms=None, normalizer=None):
+        self.filename = filename
+        self.cache_dir = cache_dir
+        self.timeout_ms = timeout_ms
+        self.normalizer = normalizer
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._load, name='dict-loader', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def is_ready(self):
+        return self.done.is_set()
+
+    def factory(self, timeout=None):
+        """
+        Returns the `GameFactory`, or raises whatever went wrong while loading.
+        """
+        if not self.done.wait(timeout):
+            raise TimeoutError('Dictionary {} is still loading'.format(self.filename))
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def _load(self):
+        try:
+            factory = hangchat.GameFactory([])
+            factory.swap_dictionary(build_dictionary(self.filename, self.cache_dir, self.normalizer))
+            if self.timeout_ms is not None:
+                factory.set_default_timeout_ms(self.timeout_ms)
+            self.result = factory
+            logger.info('Loaded %d words from %s', len(factory.dictionary), self.filename)
+        except Exception as e:
+            logger.exception('Could not load dictionary %s', self.filename)
+            self.error = e
+        finally:
+            self.done.set()
+
+
+class DictionaryReloader:
+    """
+    Rebuilds the dictionary of a running `GameFactory` in the background,
+    and swaps it in once it's done.  Running games keep their word; only new
+    games see the new dictionary.  Difficulty settings carry over.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def reload(self, filename, cache_dir=None, normalizer=None, on_done=None):
+        """
+        Starts a reload.  Returns `False` if one is already running.
+        on_done: called with the new `Dictionary`, or with the exception if
+            something went wrong.  Runs on the background thread.
+        """
+        with self.lock:
+            if self.is_running():
+                return False
+            self.thread = threading.Thread(target=self._reload, name='dict-reloader', daemon=True,
+                                           args=(filename, cache_dir, normalizer, on_done))
+            self.thread.start()
+            return True
+
+    def _reload(self, filename, cache_dir, normalizer, on_done):
+        old = self.factory.dictionary
+        try:
+            result = build_dictionary(filename, cache_dir, normalizer, old.difficulty, old.max_difficulty)
+            self.factory.swap_dictionary(result)
+            logger.info('Reloaded %d words from %s', len(result), filename)
+        except Exception as e:
+            logger.exception('Could not reload dictionary %s', filename)
+            result = e
+        if on_done is not None:
+            on_done(result)
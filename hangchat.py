@@ -45,6 +45,8 @@ Note that the caller manages the timer, so that makes mocking / single-threading
 """
 
 import secrets
+import time
+import unicodedata
 
 
 # === Interface ===
@@ -67,6 +69,17 @@ class AbstractCallbacks:
     def send_public_hint(self, game_id, hint):
         raise NotImplementedError()
 
+    def send_first_hints(self, game_id, private_hints, public_hint):
+        """
+        private_hints: dict from player to their private hint.
+        Called right after `game_started`.  By default, this just calls
+        `send_private_hint` for everyone and then `send_public_hint`.
+        Override it if you can send everything in one burst.
+        """
+        for player, hint in private_hints.items():
+            self.send_private_hint(game_id, player, hint)
+        self.send_public_hint(game_id, public_hint)
+
     def game_ended(self, game_id, word, winner_or_none, slacker_or_none):
         raise NotImplementedError()
 
@@ -79,6 +92,13 @@ class AbstractCallbacks:
     def remove_timer(self, game_id, timer_id):
         raise NotImplementedError()
 
+    def report_timer_lag(self, game_id, lateness_ms):
+        """
+        Called by `GameState.run_timer` with how late the timer fired,
+        compared to when it was due.  Does nothing by default; see `watchdog`.
+        """
+        pass
+
 
 class DummyCallbacks(AbstractCallbacks):
     """
@@ -155,18 +175,137 @@ DEFAULT_TIMEOUT_MS = 30_000
 STATE_UNREVEALED = 0
 STATE_PRIVATE_REVEALED = 1
 STATE_PUBLIC_REVEALED = 2
+# Characters that split a phrase into segments.  They are always revealed,
+# and never count as a hint.
+SEPARATORS = frozenset(' -')
+# Blocks of combining diacritical marks.  See `Normalizer`.
+COMBINING_RANGES = [
+    (0x0300, 0x0370),
+    (0x1AB0, 0x1B00),
+    (0x1DC0, 0x1E00),
+    (0x20D0, 0x2100),
+    (0xFE20, 0xFE30),
+]
+# How people type umlauts on keyboards that don't have them.
+TRANSLITERATIONS = {
+    'de': {'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'},
+}
 
 
 # === Helpers ===
 
 def clean_word(word):
-    return word.strip().lower()
+    # Also collapses runs of whitespace, so that phrases compare sanely.
+    return ' '.join(word.split()).lower()
+
+
+class Normalizer:
+    """
+    Turns words and guesses into a 'folded' form, in which all spellings that
+    we consider equivalent compare equal.  Only the folded forms are ever
+    compared; hints and messages still use the original (cleaned) word.
+
+    All tables are built once, so `fold` is a handful of C-level calls,
+    without any per-character loop in Python.
+
+    >>> Normalizer().fold('STRASSE') == Normalizer().fold('Straße')
+    True
+    >>> Normalizer(transliterate='de').fold('Mädchen')
+    'maedchen'
+    >>> Normalizer(fold_diacritics=True).fold('Crème brûlée')
+    'creme brulee'
+    """
+
+    def __init__(self, casefold=True, form='NFC', fold_diacritics=False, sharp_s=True, transliterate=None):
+        """
+        casefold: Use `str.casefold` instead of just `str.lower`.  Note that
+            casefolding already turns 'ß' into 'ss'.
+        form: Unicode normalization form of the result ('NFC', 'NFKC',
+            'NFD', 'NFKD'), or `None` to leave it alone.
+        fold_diacritics: Drop all combining marks, e.g. 'é' becomes 'e'.
+        sharp_s: Treat 'ß' as 'ss', even without `casefold`.
+        transliterate: Name of an entry in `TRANSLITERATIONS`, or a dict.
+            This runs before `fold_diacritics`, so 'ä' can become 'ae'
+            instead of just 'a'.
+        """
+        self.casefold = casefold
+        self.form = form
+        self.fold_diacritics = fold_diacritics
+        # Enough to build the same `Normalizer` again.  See `__reduce__`.
+        self.args = (casefold, form, fold_diacritics, sharp_s, transliterate)
+
+        replacements = dict()
+        if sharp_s:
+            replacements['ß'] = 'ss'
+            replacements['ẞ'] = 'ss'
+        if isinstance(transliterate, str):
+            transliterate = TRANSLITERATIONS[transliterate]
+        if transliterate:
+            replacements.update(transliterate)
+        self.replace_table = str.maketrans(replacements) if replacements else None
+
+        self.drop_table = None
+        if fold_diacritics:
+            self.drop_table = {cp: None for (begin, end) in COMBINING_RANGES for cp in range(begin, end)}
+
+    @staticmethod
+    def from_config(config):
+        """
+        config: dict with the same keys as the constructor arguments, e.g.
+            the 'normalization' entry of `config.json`.
+        """
+        return Normalizer(**config)
+
+    def __reduce__(self):
+        # Pickle only the settings, not the (big) tables.
+        return (Normalizer, self.args)
+
+    def fold(self, word):
+        word = clean_word(word)
+        if self.casefold:
+            word = word.casefold()
+        if self.replace_table is not None:
+            # The table only knows composed characters.
+            word = unicodedata.normalize('NFC', word).translate(self.replace_table)
+        if self.drop_table is not None:
+            word = unicodedata.normalize('NFKD', word).translate(self.drop_table)
+        if self.form is not None:
+            word = unicodedata.normalize(self.form, word)
+        return word
+
+
+DEFAULT_NORMALIZER = Normalizer()
 
 
 def read_cleaned_dict(filename):
-    with open(dict_file, 'r') as fp:
+    """
+    Reads a dictionary: one word or phrase per line.  The words of a phrase
+    are separated by spaces or hyphens (see `SEPARATORS`).  Empty lines,
+    lines that consist only of separators, and lines starting with '#' are
+    ignored.
+    """
+    with open(filename, 'r') as fp:
         # If opening or reading fails, there is nothing meaningful we can do anyway.
-        return [clean_word(line) for line in fp.readlines()]
+        words = [clean_word(line) for line in fp if not line.startswith('#')]
+    # Empty lines would make for very short games, and a lone '-' would
+    # leave nothing to reveal at all.
+    separators = ''.join(SEPARATORS)
+    return [w for w in words if w.strip(separators)]
+
+
+def read_difficulty(filename):
+    """
+    Reads per-word difficulty scores, as written by `simulate.py`: one
+    'word<TAB>score<TAB>...' per line.  Returns a dict from word to score.
+    """
+    scores = dict()
+    with open(filename, 'r') as fp:
+        for line in fp:
+            if line.startswith('#') or not line.strip():
+                continue
+            word, score = line.rstrip('\n').split('\t')[:2]
+            scores[clean_word(word)] = float(score)
+    return scores
 
 
 def is_slacking(min_guesses, min2_guesses):
@@ -177,23 +316,287 @@ def is_slacking(min_guesses, min2_guesses):
     Note that this rule fails if there are two slackers with similar behavior,
     e.g. two slackers that don't make any guesses.
     """
-    return (min_guesses + 5) * 2 < min2_guesser
+    return (min_guesses + 5) * 2 < min2_guesses
+
+
+def determine_slacker(player_guesses):
+    """
+    player_guesses: dict from player to the amount of guesses they made.
+    Returns the slacker, or `None`.  See `is_slacking`.
+    """
+    # Determine the two players with the fewest guesses.
+    min_guesses, min_player = float('inf'), None
+    min2_guesses = float('inf')
+
+    for player, amount in player_guesses.items():
+        if amount < min_guesses:
+            min2_guesses = min_guesses
+            min_guesses, min_player = amount, player
+        elif amount < min2_guesses:
+            min2_guesses = amount
+
+    if is_slacking(min_guesses, min2_guesses):
+        return min_player
+    else:
+        return None
 
 
 # === Actual implementation ===
 
+class HintBoard:
+    """
+    Keeps track of which characters of a word (or phrase) have been revealed,
+    and decides which one to reveal next.
+
+    Separators are revealed from the start.  The remaining characters are
+    grouped into segments (the words of a phrase), and each segment keeps its
+    indices bucketed by state.  So picking and revealing only costs
+    O(number of segments), and rendering a hint is a single `join`, even for
+    long phrases.
+
+    >>> b = HintBoard('ab-cd ef')
+    >>> b.public_hint(), b.hidden_count()
+    ('__-__ __', 6)
+    >>> for _ in range(3):
+    ...     b.set_state(b.pick(), STATE_PUBLIC_REVEALED)
+    >>> b.segment_public  # One each, never two in the same segment.
+    [1, 1, 1]
+    >>> for _ in range(3):
+    ...     b.set_state(b.pick(), STATE_PUBLIC_REVEALED)
+    >>> b.public_hint(), b.hidden_count()
+    ('ab-cd ef', 0)
+
+    More players than letters: once every letter went out privately, the
+    private hints start over.
+
+    >>> g = GameFactory(['x-y']).start('g', DummyCallbacks(), ['Anton', 'Berta', 'Caesar'])
+    >>> sorted(set(g.private_hints.values())), g.public_hint
+    (['_-y', 'x-_'], '_-_')
+    >>> g.run_timer(None, g.last_timer)
+    >>> g.public_hint in ['x-_', '_-y'], g.is_running
+    (True, True)
+
+    Revealing the last hidden letter ends the game instead.
+
+    >>> g.run_timer(None, g.last_timer)
+    >>> g.is_running, g.board.hidden_count()
+    (False, 0)
+    """
+
+    def __init__(self, word):
+        self.word = word
+        self.states = [STATE_UNREVEALED] * len(word)
+        # Only ever contains public information.
+        self.public_chars = ['_'] * len(word)
+        # segment -> state -> list of indices
+        self.buckets = []
+        # Per index: (segment, position in its bucket).  `None` for separators.
+        self.slots = [None] * len(word)
+        self.segment_sizes = []
+        self.segment_public = []
+        # Amount of non-separator characters per state.
+        self.state_counts = [0, 0, 0]
+
+        segment = None
+        for i, c in enumerate(word):
+            if c in SEPARATORS:
+                self.states[i] = STATE_PUBLIC_REVEALED
+                self.public_chars[i] = c
+                segment = None
+                continue
+            if segment is None:
+                segment = len(self.buckets)
+                self.buckets.append(([], [], []))
+                self.segment_sizes.append(0)
+                self.segment_public.append(0)
+            bucket = self.buckets[segment][STATE_UNREVEALED]
+            self.slots[i] = (segment, len(bucket))
+            bucket.append(i)
+            self.segment_sizes[segment] += 1
+            self.state_counts[STATE_UNREVEALED] += 1
+        self.blank = ''.join(self.public_chars)
+
+    def hidden_count(self):
+        """
+        Number of characters that have not been revealed publicly yet.
+        """
+        return self.state_counts[STATE_UNREVEALED] + self.state_counts[STATE_PRIVATE_REVEALED]
+
+    def pick(self):
+        """
+        Picks an arbitrary position that shall be revealed.
+        It uses a sophisticated heuristic that employs machine-learning and neural nets.
+        (I.e., if-statements and guesstimates from my brain.)
+
+        Specifically: Prefer the least-revealed characters, and among those,
+        the segment that is publicly revealed the least (relative to its
+        length), so every word of a phrase gets its fair share of hints.
+
+        It is the caller's duty to call `set_state`.
+        """
+        # Determine the minimum 'reveal' level:
+        min_state = next((s for s, count in enumerate(self.state_counts) if count > 0), None)
+        assert min_state is not None, ('Nothing to reveal', self.word)
+
+        best_segments = []
+        best_ratio = None
+        for segment, buckets in enumerate(self.buckets):
+            if not buckets[min_state]:
+                continue
+            # Compare fractions without dividing: public / size
+            ratio = (self.segment_public[segment], self.segment_sizes[segment])
+            if best_ratio is None or ratio[0] * best_ratio[1] < best_ratio[0] * ratio[1]:
+                best_segments = [segment]
+                best_ratio = ratio
+            elif ratio[0] * best_ratio[1] == best_ratio[0] * ratio[1]:
+                best_segments.append(segment)
+        assert best_segments, (self.word, self.states, min_state)
+
+        return secrets.choice(self.buckets[secrets.choice(best_segments)][min_state])
+
+    def set_state(self, index, new_state):
+        old_state = self.states[index]
+        if old_state == new_state:
+            return
+        segment, position = self.slots[index]
+        # Swap-remove from the old bucket.
+        old_bucket = self.buckets[segment][old_state]
+        moved = old_bucket.pop()
+        if moved != index:
+            old_bucket[position] = moved
+            self.slots[moved] = (segment, position)
+        new_bucket = self.buckets[segment][new_state]
+        self.slots[index] = (segment, len(new_bucket))
+        new_bucket.append(index)
+
+        self.states[index] = new_state
+        self.state_counts[old_state] -= 1
+        self.state_counts[new_state] += 1
+        if new_state == STATE_PUBLIC_REVEALED:
+            self.public_chars[index] = self.word[index]
+            self.segment_public[segment] += 1
+
+    def public_hint(self):
+        return ''.join(self.public_chars)
+
+    def private_hint(self, index):
+        return self.blank[:index] + self.word[index] + self.blank[index + 1:]
+
+
+class Dictionary:
+    """
+    A word list and everything derived from it.  Never modified after
+    construction, so that `GameFactory` can swap it out in a single
+    assignment, even while other threads are starting games.
+    """
+
+    def __init__(self, word_list, normalizer=None, cleaned=False, folded_list=None,
+                 difficulty=None, max_difficulty=None):
+        """
+        cleaned: Set this if `word_list` already went through `clean_word`,
+            e.g. because it came from `dict_cache`.  Saves a pass over the list.
+        folded_list: `[normalizer.fold(w) for w in word_list]`, if you
+            happen to have it already.
+        difficulty, max_difficulty: See `GameFactory.set_difficulty`.
+        """
+        self.normalizer = normalizer or DEFAULT_NORMALIZER
+        if cleaned:
+            self.word_list = list(word_list)
+        else:
+            self.word_list = [clean_word(w) for w in word_list]
+        # Parallel to `word_list`: `folded_list[i] == normalizer.fold(word_list[i])`
+        if folded_list is None:
+            fold = self.normalizer.fold
+            folded_list = [fold(w) for w in self.word_list]
+        assert len(folded_list) == len(self.word_list)
+        self.folded_list = folded_list
+        self.difficulty = difficulty
+        self.max_difficulty = max_difficulty
+        # Indices into `word_list` that `GameFactory.start` may pick, or `None` for all.
+        self.eligible = None
+        if difficulty is not None and max_difficulty is not None:
+            self.eligible = [i for i, w in enumerate(self.word_list)
+                             if difficulty.get(w, 0.0) <= max_difficulty]
+            # Don't end up without any words at all.
+            if not self.eligible:
+                self.eligible = None
+
+    def __len__(self):
+        return len(self.word_list)
+
+    def pick(self):
+        """
+        Returns the index of a random eligible word.
+        """
+        # TODO: Do something more sophisticated here; maybe avoid picking the same word too often?
+        # Maybe something like https://github.com/BenWiederhake/random_tweets/blob/master/feel_random.py
+        if self.eligible is None:
+            return secrets.randbelow(len(self.word_list))
+        return secrets.choice(self.eligible)
+
+
 class GameFactory:
     """
     Contains all the options and preferences to start a new game, like the dictionary.
     """
 
-    def __init__(self, word_list):
+    def __init__(self, word_list, normalizer=None):
         self.timeout_ms = DEFAULT_TIMEOUT_MS
-        self.word_list = None
-        self.set_wordlist(word_list)
+        self.dictionary = Dictionary(word_list, normalizer)
+
+    # The dictionary can be swapped at any time, so grab `self.dictionary`
+    # only once if you need more than one of these.
+
+    @property
+    def word_list(self):
+        return self.dictionary.word_list
 
-    def set_wordlist(self, word_list):
-        self.word_list = [clean_word(w) for w in word_list]
+    @property
+    def folded_list(self):
+        return self.dictionary.folded_list
+
+    @property
+    def normalizer(self):
+        return self.dictionary.normalizer
+
+    def set_wordlist(self, word_list, cleaned=False):
+        """
+        Only affects new games.
+        cleaned: See `Dictionary`.
+        """
+        old = self.dictionary
+        self.dictionary = Dictionary(word_list, old.normalizer, cleaned=cleaned,
+                                     difficulty=old.difficulty, max_difficulty=old.max_difficulty)
+
+    def set_normalizer(self, normalizer):
+        """
+        Only affects new games.  Re-folds the entire word list.
+        """
+        old = self.dictionary
+        self.dictionary = Dictionary(old.word_list, normalizer, cleaned=True,
+                                     difficulty=old.difficulty, max_difficulty=old.max_difficulty)
+
+    def set_difficulty(self, scores, max_difficulty=None):
+        """
+        Only affects new games.
+        scores: dict from word to difficulty score (0 is trivial, 1 means
+            nobody ever solves it), e.g. from `read_difficulty`.
+        max_difficulty: If set, `start` only picks words that are at most
+            that difficult.  Words without a score are always fair game.
+        """
+        old = self.dictionary
+        self.dictionary = Dictionary(old.word_list, old.normalizer, cleaned=True, folded_list=old.folded_list,
+                                     difficulty=scores, max_difficulty=max_difficulty)
+
+    def swap_dictionary(self, dictionary):
+        """
+        Only affects new games; running games keep their word.
+        Returns the old `Dictionary`.
+        Building a `Dictionary` can take a while, but swapping is atomic, so
+        you can build it in another thread and then call this.
+        """
+        old, self.dictionary = self.dictionary, dictionary
+        return old
 
     def set_default_timeout_ms(self, timeout_ms):
         """
@@ -202,16 +605,67 @@ class GameFactory:
         """
         self.timeout_ms = timeout_ms
 
-    def start(self, game_id, callbacks, players):
+    def prepare(self, players):
+        """
+        Picks the word and the first hints for a game with these `players`,
+        without starting it yet.  See `PreparedRound`.
+        """
+        dictionary = self.dictionary
+        index = dictionary.pick()
+        return PreparedRound(players, dictionary.word_list[index],
+                             folded_word=dictionary.folded_list[index], normalizer=dictionary.normalizer,
+                             dictionary=dictionary)
+
+    def start(self, game_id, callbacks, players, prepared=None):
         """
         game_id: arbitrary, will be passed back to `callbacks`.  If `None`, will use to the `GameState` object.
         callbacks: instance of `AbstractCallbacks`.
         players: list of non-equal numbers or strings (mixed) that `callbacks` understands.
+        prepared: result of `prepare`, if you have one.  Ignored if it was
+            prepared for different players, or from a dictionary that was
+            swapped out since, or was already used.
         """
-        # TODO: Do something more sophisticated here; maybe avoid picking the same word too often?
-        # Maybe something like https://github.com/BenWiederhake/random_tweets/blob/master/feel_random.py
-        word = secrets.choice(self.word_list)
-        return GameState(game_id, callbacks, players, word, self.timeout_ms)
+        if prepared is None or not prepared.fits(players, self.dictionary):
+            prepared = self.prepare(players)
+        return GameState(game_id, callbacks, prepared.players, prepared.word, self.timeout_ms, prepared=prepared)
+
+
+class PreparedRound:
+    """
+    Everything about a game that can be decided before it starts: the word,
+    and the first private and public hints.  Preparing this in advance (see
+    `rounds.RoundPipeline`) leaves almost nothing to do when the game starts.
+    """
+
+    def __init__(self, players, word, folded_word=None, normalizer=None, dictionary=None):
+        """
+        dictionary: the `Dictionary` that `word` came from, if any.
+        """
+        self.players = tuple(players)
+        self.word = word
+        self.dictionary = dictionary
+        self.normalizer = normalizer or DEFAULT_NORMALIZER
+        self.folded_word = folded_word
+        if self.folded_word is None:
+            self.folded_word = self.normalizer.fold(word)
+        self.board = HintBoard(word)
+        self.private_hints = dict()
+        for player in self.players:
+            hint_index = self.board.pick()
+            self.board.set_state(hint_index, STATE_PRIVATE_REVEALED)
+            self.private_hints[player] = self.board.private_hint(hint_index)
+        self.public_hint = self.board.public_hint()
+        # The board belongs to the game once it starts.
+        self.used = False
+
+    def fits(self, players, dictionary=None):
+        """
+        dictionary: if given, the word must have come from exactly this
+            `Dictionary`.  After a reload, it may not even be in there anymore.
+        """
+        if dictionary is not None and self.dictionary is not dictionary:
+            return False
+        return not self.used and self.players == tuple(players)
 
 
 class GameState:
@@ -219,11 +673,16 @@ class GameState:
     Represents a running game.
     """
 
-    def __init__(self, game_id, callbacks, players, word, timeout_ms):
+    def __init__(self, game_id, callbacks, players, word, timeout_ms, folded_word=None, normalizer=None,
+                 prepared=None):
         """
         game_id: arbitrary, will be passed back to `callbacks`.
         callbacks: instance of `AbstractCallbacks`.
         players: list of non-equal numbers or strings (mixed) that `callbacks` understands.
+        folded_word: `normalizer.fold(word)`, if you happen to have it already.
+        normalizer: instance of `Normalizer`, used to compare guesses.
+        prepared: a `PreparedRound` for exactly these players and this word.
+            If given, `folded_word` and `normalizer` are taken from there.
         """
         # Basic setup
         self.game_id = game_id
@@ -234,11 +693,29 @@ class GameState:
         # This can fail if a player occurs twice, two players have an equal
         # (`==`) ID, or you supplied a generator instead of a sequence.
         assert len(self.player_guesses) == len(players), (self.player_guesses, players)
+        if prepared is None:
+            prepared = PreparedRound(players, word, folded_word, normalizer)
+        assert prepared.fits(players) and prepared.word == word, (prepared.players, players, prepared.word, word)
+        prepared.used = True
         self.word = word
+        self.normalizer = prepared.normalizer
+        self.folded_word = prepared.folded_word
         self.timeout_ms = timeout_ms
-        self.hint_states = [STATE_UNREVEALED] * len(word)
+        self.board = prepared.board
+        # For backwards compatibility.  Don't modify it directly, use `self.board`.
+        self.hint_states = self.board.states
+        self.private_hints = prepared.private_hints
+        self.public_hint = prepared.public_hint
+        # Bumped whenever something a player can look at changes, i.e. a new
+        # hint or the end of the game.  Wrong guesses don't count.  Caches
+        # like `inline_query.InlineResultCache` rely on this.
+        self.version = 0
         self.is_running = True
         self.last_timer = None
+        # `time.monotonic()` at which `last_timer` is due, or `None`.
+        self.timer_deadline = None
+        # Wall clock, for statistics only.  See `history`.
+        self.started_at = time.time()
 
         callbacks.game_started(self.game_id)
         self._send_first_hints()
@@ -248,16 +725,39 @@ class GameState:
         """
         timeout_ms: The new timeout amount in milliseconds.
 
-        Note that this does *not* affect the currently running timeout. This
-        would require monotonic time: `set_timeout_ms` would first need to
-        determine how much time of the currently running timer has passed,
-        cancel that timer, and restart it with an appropriate calculated
-        amount.
-
-        In short, this would be very non-trivial, so fuck it.
+        Note that this does *not* affect the currently running timeout.
+        `timer_deadline` knows when it's due, so `set_timeout_ms` could
+        cancel that timer and restart it with an appropriately calculated
+        amount.  But nobody needed that yet, so fuck it.
         """
         self.timeout_ms = timeout_ms
 
+    def suspend(self):
+        """
+        Stops the timer, so the game can be put away (e.g. pickled to disk).
+        The game doesn't end; call `resume` to continue it.
+        """
+        self._clear_timer()
+
+    def resume(self, callbacks):
+        """
+        Continues a game after `suspend`, or after unpickling.  The timer
+        starts over with the full `timeout_ms`.
+        """
+        self.callbacks = callbacks
+        if self.is_running:
+            self._set_timer()
+
+    def __getstate__(self):
+        # Neither the callbacks nor the timer survive pickling.  The
+        # normalizer does, since `folded_word` is only meaningful with the
+        # very same settings.  It only pickles its settings, so it's small.
+        state = self.__dict__.copy()
+        state['callbacks'] = None
+        state['last_timer'] = None
+        state['timer_deadline'] = None
+        return state
+
     def call_abort_game(self):
         """
         A user or something requested the game to be aborted.
@@ -267,6 +767,7 @@ class GameState:
         """
         assert self.is_running
         self.is_running = False
+        self.version += 1
         self._clear_timer()
         self.callbacks.game_ended(self.game_id, self.word, None, self._determine_slacker())
 
@@ -278,8 +779,7 @@ class GameState:
         # Clear the timer beforehand, to avoid accidents.
         self._clear_timer()
 
-        revealed_indices = {i for i, state in enumerate(self.hint_states) if state == STATE_PUBLIC_REVEALED}
-        hint_string = self._make_hint(revealed_indices)
+        hint_string = self.board.public_hint()
         self.callbacks.send_public_hint(self.game_id, hint_string)
 
         self._set_timer()
@@ -295,78 +795,71 @@ class GameState:
         self._clear_timer()
         self.player_guesses[player] += 1
 
-        guessed_word = clean_word(guessed_word)
         # If we ever get excesively serious about this, here's an opportunity for timing attacks:
-        if guessed_word == self.word:
+        if self.normalizer.fold(guessed_word) == self.folded_word:
             self.is_running = False
+            self.version += 1
             self.callbacks.game_ended(self.game_id, self.word, player, self._determine_slacker())
         else:
-            self.callbacks.send_sorry_wrong(self.game_id, player, guessed_word)
+            self.callbacks.send_sorry_wrong(self.game_id, player, clean_word(guessed_word))
             self._set_timer()
 
+    def reveal_count(self):
+        """
+        How many characters have been revealed publicly so far.
+        """
+        return self.board.state_counts[STATE_PUBLIC_REVEALED]
+
     def run_timer(self, action_data, timer_id):
         """
         action_data: The piece of data given to `AbstractCallbacks.set_timer` earlier.
         timer_id: The ID of the timer associated with the current call. Note that it
             is no longer valid, and a new call to `set_timer` may return the same ID again.
+
+        A timer that was already removed, or that lost a race against the end
+        of the game, is ignored.  With a timer thread, `remove_timer` can't
+        always stop a timer that is just about to fire.
         """
-        assert self.is_running
         assert action_data is None, action_data  # `action_data` is not used yet.
-        assert self.last_timer is not None
-        assert self.last_timer == timer_id, (self.last_timer, timer_id)
+        if not self.is_running or self.last_timer != timer_id:
+            # Stale: raced with a guess (which reset the timer) or the end of the game.
+            return
         self.last_timer = None
+        if self.timer_deadline is not None:
+            lateness_ms = (time.monotonic() - self.timer_deadline) * 1000
+            self.timer_deadline = None
+            self.callbacks.report_timer_lag(self.game_id, lateness_ms)
 
         hint_index = self._pick_hint_index()
-        self.hint_states[hint_index] = STATE_PUBLIC_REVEALED
-        revealed_indices = {i for i, state in enumerate(self.hint_states) if state == STATE_PUBLIC_REVEALED}
-        if len(revealed_indices) >= len(self.word):
+        self.board.set_state(hint_index, STATE_PUBLIC_REVEALED)
+        if self.board.hidden_count() == 0:
             # We're about to reveal the entire word.
             # This means the players have totally and utterly failed.
             # So instead of revealing the last letter, instead we end the game.
             self.is_running = False
+            self.version += 1
             self.callbacks.game_ended(self.game_id, self.word, None, self._determine_slacker())
             # Don't set a new timer.
             return
 
-        hint_string = self._make_hint(revealed_indices)
+        hint_string = self.board.public_hint()
+        self.public_hint = hint_string
+        self.version += 1
         self.callbacks.send_public_hint(self.game_id, hint_string)
 
         self._set_timer()
 
     def _pick_hint_index(self):
         """
-        Picks an arbitrary position that shall be revealed.
-        It uses a sophisticated heuristic that employs machine-learning and neural nets.
-        (I.e., if-statements and guesstimates from my brain.)
-
-        It is the caller's duty to update `self.hint_states`.
+        See `HintBoard.pick`.
+        It is the caller's duty to update `self.board`.
         """
-        # Determine the minimum 'reveal' level:
-        min_state = min(self.hint_states)
-        relevant_indices = [i for (i, state) in enumerate(self.hint_states) if state == min_state]
-        assert len(relevant_indices) > 0, (self.hint_states, min_state)
-
-        return secrets.choice(relevant_indices)
-
-    def _make_hint(self, revealed_indices):
-        hint_chars = []
-        # Not very efficient, but thankfully words aren't that long anyway.
-        for i, c in enumerate(self.word):
-            if i in revealed_indices:
-                hint_chars.append(c)
-            else:
-                hint_chars.append('_')
-        hint_string = ''.join(hint_chars)
-        assert len(hint_string) == len(self.word), (self.word, revealed_indices, hint_string)
-        return hint_string
+        return self.board.pick()
 
     def _send_first_hints(self):
-        for player in self.player_guesses.keys():
-            hint_index = self._pick_hint_index()
-            self.hint_states[hint_index] = STATE_PRIVATE_REVEALED
-            hint_string = self._make_hint({hint_index})
-            self.callbacks.send_private_hint(self.game_id, player, hint_string)
-        self.callbacks.send_public_hint(self.game_id, self._make_hint(set()))
+        # The hints themselves were already picked by `PreparedRound`.
+        self.version += 1
+        self.callbacks.send_first_hints(self.game_id, self.private_hints, self.public_hint)
 
     def _clear_timer(self):
         """
@@ -375,6 +868,7 @@ class GameState:
         if self.last_timer is not None:
             self.callbacks.remove_timer(self.game_id, self.last_timer)
             self.last_timer = None
+            self.timer_deadline = None
 
     def _set_timer(self):
         """
@@ -384,21 +878,8 @@ class GameState:
         assert self.is_running
         self._clear_timer()
         # Currently, `action_data` isn't used.
+        self.timer_deadline = time.monotonic() + self.timeout_ms / 1000
         self.last_timer = self.callbacks.set_timer(self.game_id, self.timeout_ms, None)
 
     def _determine_slacker(self):
-        # Determine the two players with the fewest guesses.
-        min_guesses, min_player = float('inf'), None
-        min2_guesses = float('inf')
-
-        for player, amount in self.player_guesses.items():
-            if amount < min_guesses:
-                min2_guesses = min_guesses
-                min_guesses, min_player = amount, player
-            elif amount < min2_guesses:
-                min2_guesses = amount
-
-        if is_slacking(min_guesses, min2_guesses):
-            return min_player
-        else:
-            return None
+        return determine_slacker(self.player_guesses)
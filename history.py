@@ -0,0 +1,179 @@
+#!/bin/false
+# This is a library.
+
+"""
+Append-only, columnar history of finished games.
+
+A history is a directory.  Each column is a file of fixed-size little-endian
+values (see `GAME_COLUMNS` and `GUESS_COLUMNS`), so it can be memory-mapped
+as a NumPy array without any parsing.  Words and players are stored as
+integer IDs; the strings live in `words.txt` and `players.txt`, one per
+line, where the line number is the ID.
+
+There are two tables: one row per game, and one row per (game, player)
+with that player's amount of guesses.
+
+Call `HistoryWriter.record` from `AbstractCallbacks.game_ended`, with the
+`GameState` that just ended.  Rows are buffered and written in batches; see
+`history_query` for reading them back.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+# name -> dtype.  Never reorder or change existing columns; add new ones at the end.
+GAME_COLUMNS = {
+    'ended_at': '<f8',  # Unix timestamp
+    'duration_s': '<f4',
+    'word': '<i4',
+    'reveals': '<i2',
+    'guesses': '<i4',  # total of all players
+    'players': '<i2',
+    'winner': '<i4',  # -1 if nobody
+    'slacker': '<i4',  # -1 if nobody
+}
+GUESS_COLUMNS = {
+    'game': '<i8',  # row in the games table
+    'player': '<i4',
+    'count': '<i4',
+}
+NOBODY = -1
+DEFAULT_BATCH_SIZE = 1024
+
+
+def column_path(directory, table, name):
+    return os.path.join(directory, '{}.{}.bin'.format(table, name))
+
+
+def table_length(directory, table, columns):
+    """
+    The amount of complete rows, i.e. the length of the shortest column.
+    """
+    lengths = []
+    for name, dtype in columns.items():
+        try:
+            size = os.path.getsize(column_path(directory, table, name))
+        except FileNotFoundError:
+            size = 0
+        lengths.append(size // np.dtype(dtype).itemsize)
+    return min(lengths)
+
+
+def read_strings(directory, name):
+    try:
+        with open(os.path.join(directory, name + '.txt'), 'r') as fp:
+            data = fp.read()
+    except FileNotFoundError:
+        return []
+    return data.split('\n')[:-1]
+
+
+class StringTable:
+    """
+    Append-only mapping from strings to consecutive integer IDs.
+    """
+
+    def __init__(self, directory, name):
+        self.filename = os.path.join(directory, name + '.txt')
+        self.strings = read_strings(directory, name)
+        self.ids = {s: i for i, s in enumerate(self.strings)}
+        self.pending = []
+
+    def id_of(self, string):
+        string = str(string)
+        # Newlines would break the file format.
+        assert '\n' not in string, string
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+            self.pending.append(string)
+        return string_id
+
+    def flush(self):
+        if not self.pending:
+            return
+        with open(self.filename, 'a') as fp:
+            fp.write(''.join(s + '\n' for s in self.pending))
+        self.pending = []
+
+
+class HistoryWriter:
+    def __init__(self, directory, batch_size=DEFAULT_BATCH_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.words = StringTable(directory, 'words')
+        self.players = StringTable(directory, 'players')
+        # A crash in the middle of a flush can leave columns of different
+        # lengths.  Cut them back to the last complete row.
+        self.game_rows = self._truncate('games', GAME_COLUMNS)
+        self._truncate('guesses', GUESS_COLUMNS)
+        self.games = {name: [] for name in GAME_COLUMNS}
+        self.guesses = {name: [] for name in GUESS_COLUMNS}
+        # Games end on the dispatcher thread (a guess) as well as on the
+        # timer thread (the last hint), and all columns must stay aligned.
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return self.game_rows
+
+    def record(self, game, winner_or_none, slacker_or_none, ended_at=None, duration_s=None):
+        """
+        game: the `GameState` that just ended.
+        ended_at, duration_s: default to now, and the time since the game started.
+        """
+        if ended_at is None:
+            ended_at = time.time()
+        if duration_s is None:
+            duration_s = ended_at - game.started_at
+        with self.lock:
+            row = self.game_rows + len(self.games['ended_at'])
+
+            self.games['ended_at'].append(ended_at)
+            self.games['duration_s'].append(duration_s)
+            self.games['word'].append(self.words.id_of(game.word))
+            self.games['reveals'].append(game.reveal_count())
+            self.games['guesses'].append(sum(game.player_guesses.values()))
+            self.games['players'].append(len(game.player_guesses))
+            self.games['winner'].append(NOBODY if winner_or_none is None else self.players.id_of(winner_or_none))
+            self.games['slacker'].append(NOBODY if slacker_or_none is None else self.players.id_of(slacker_or_none))
+            for player, count in game.player_guesses.items():
+                self.guesses['game'].append(row)
+                self.guesses['player'].append(self.players.id_of(player))
+                self.guesses['count'].append(count)
+
+            if len(self.games['ended_at']) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            # Strings first, so that every ID in a column has its string.
+            self.words.flush()
+            self.players.flush()
+            self.game_rows += len(self.games['ended_at'])
+            self._append('games', GAME_COLUMNS, self.games)
+            self._append('guesses', GUESS_COLUMNS, self.guesses)
+
+    def close(self):
+        self.flush()
+
+    def _append(self, table, columns, buffers):
+        for name, dtype in columns.items():
+            values = buffers[name]
+            if not values:
+                continue
+            with open(column_path(self.directory, table, name), 'ab') as fp:
+                fp.write(np.asarray(values, dtype=dtype).tobytes())
+            buffers[name] = []
+
+    def _truncate(self, table, columns):
+        rows = table_length(self.directory, table, columns)
+        for name, dtype in columns.items():
+            path = column_path(self.directory, table, name)
+            if os.path.exists(path):
+                os.truncate(path, rows * np.dtype(dtype).itemsize)
+        return rows
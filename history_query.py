@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+"""
+Vectorized queries over a `history` directory.
+
+All columns are memory-mapped, and every query is a handful of NumPy
+operations over whole columns, so even millions of games take well under a
+second.
+
+>>> import tempfile, hangchat, history, history_query
+>>> tmp = tempfile.TemporaryDirectory()
+>>> writer = history.HistoryWriter(tmp.name)
+>>> gf = hangchat.GameFactory(['ahoy'])
+>>> for hour, (word, reveals, winner) in enumerate([('ahoy', 0, 'Anton'), ('cool', 1, None),
+...                                                  ('hell', 2, 'Berta'), ('cool', 0, None)]):
+...     gf.set_wordlist([word])
+...     g = gf.start(None, hangchat.DummyCallbacks(), ['Anton', 'Berta'])
+...     for _ in range(reveals):
+...         g.run_timer(None, g.last_timer)
+...     g.call_guess('Anton', 'nope')
+...     if winner is None:
+...         g.call_abort_game()
+...     else:
+...         g.call_guess(winner, word)
+...     writer.record(g, winner, None, ended_at=3600.0 * hour, duration_s=10)
+>>> writer.close()
+
+A crash in the middle of a flush can leave one column longer than the
+others, even with half a value at the end.  Reopening cuts it back:
+
+>>> import os
+>>> word_column = history.column_path(tmp.name, 'games', 'word')
+>>> with open(word_column, 'ab') as fp:
+...     _ = fp.write(bytes(6))
+>>> len(history.HistoryWriter(tmp.name)), os.path.getsize(word_column)
+(4, 16)
+>>> h = History(tmp.name)
+>>> h.never_solved(), h.median_reveals_before_win(), h.solve_rate()
+([('cool', 2)], 1.0, 0.5)
+
+Both ways of counting guesses per player and hour agree:
+
+>>> dense = h.guesses_per_player_per_hour()
+>>> history_query.DENSE_MIN, history_query.DENSE_FACTOR = 0, 0
+>>> by_sorting = h.guesses_per_player_per_hour()
+>>> history_query.DENSE_MIN, history_query.DENSE_FACTOR = DENSE_MIN, DENSE_FACTOR
+>>> all(np.array_equal(a, b) for a, b in zip(dense, by_sorting))
+True
+>>> [[int(x) for x in column] for column in dense]
+[[0, 0, 0, 0, 1, 1, 1, 1], [0, 1, 2, 3, 0, 1, 2, 3], [2, 1, 1, 1, 0, 0, 1, 0]]
+>>> tmp.cleanup()
+
+Usage: ./history_query.py HISTORY_DIR
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import history
+
+# Count with a dense array only if it has at most this many slots per
+# guess row (or `DENSE_MIN` slots, for small histories).  Otherwise sort.
+DENSE_FACTOR = 4
+DENSE_MIN = 1 << 16
+
+
+def _load_table(directory, table, columns):
+    rows = history.table_length(directory, table, columns)
+    result = dict()
+    for name, dtype in columns.items():
+        if rows == 0:
+            result[name] = np.empty(0, dtype=dtype)
+        else:
+            result[name] = np.memmap(history.column_path(directory, table, name), dtype=dtype, mode='r',
+                                     shape=(rows,))
+    return result
+
+
+def _sum_by_key(keys, weights):
+    """
+    Returns (unique keys, sum of the non-negative `weights` per key), sorted
+    by key.  Sorts once and sums each run, which is a lot faster than
+    `np.unique(..., return_inverse=True)`.  Clobbers `keys`.
+    """
+    if int(keys.max()) < 1 << 31:
+        # Pack both into one int64, so a single plain sort does it.
+        packed = keys
+        packed <<= 32
+        packed |= weights
+        packed.sort()
+        sorted_keys = packed >> 32
+        sorted_weights = packed
+        sorted_weights &= 0xFFFFFFFF
+    else:
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        sorted_weights = weights[order].astype(np.int64)
+    is_start = np.empty(len(sorted_keys), dtype=np.bool_)
+    is_start[0] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=is_start[1:])
+    starts = np.flatnonzero(is_start)
+    return sorted_keys[starts], np.add.reduceat(sorted_weights, starts)
+
+class History:
+    def __init__(self, directory):
+        self.games = _load_table(directory, 'games', history.GAME_COLUMNS)
+        self.guesses = _load_table(directory, 'guesses', history.GUESS_COLUMNS)
+        self.words = history.read_strings(directory, 'words')
+        self.players = history.read_strings(directory, 'players')
+        # Guess rows may refer to a game row that didn't make it to disk.
+        valid = self.guesses['game'] < len(self)
+        if not valid.all():
+            self.guesses = {name: column[valid] for name, column in self.guesses.items()}
+
+    def __len__(self):
+        return len(self.games['ended_at'])
+
+    def word_stats(self):
+        """
+        Returns (plays, solves), each indexed by word ID.
+        """
+        plays = np.bincount(self.games['word'], minlength=len(self.words))
+        solves = np.bincount(self.games['word'], weights=self.games['winner'] != history.NOBODY,
+                             minlength=len(self.words)).astype(np.int64)
+        return plays, solves
+
+    def never_solved(self, min_plays=1):
+        """
+        Words that were played at least `min_plays` times, but never solved.
+        Returns a list of (word, plays), most played first.
+        """
+        plays, solves = self.word_stats()
+        word_ids = np.flatnonzero((plays >= min_plays) & (solves == 0))
+        word_ids = word_ids[np.argsort(-plays[word_ids], kind='stable')]
+        return [(self.words[i], int(plays[i])) for i in word_ids]
+
+    def median_reveals_before_win(self):
+        reveals = self.games['reveals'][self.games['winner'] != history.NOBODY]
+        return float(np.median(reveals)) if len(reveals) else float('nan')
+
+    def solve_rate(self):
+        return float((self.games['winner'] != history.NOBODY).mean()) if len(self) else float('nan')
+
+    def guesses_per_player_per_hour(self):
+        """
+        Returns (player_ids, hours, counts): for each player and each hour
+        (as Unix timestamp // 3600) in which they finished games, the amount
+        of guesses they made.  Sorted by player, then hour.
+        """
+        # Per game first: there are fewer games than guess rows.  Truncating
+        # first is fine (timestamps are positive), and integer division is
+        # much faster than float division.
+        game_hours = self.games['ended_at'].astype(np.int64)
+        game_hours //= 3600
+        if len(self.guesses['game']) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+        first_hour = int(game_hours.min())
+        game_hours -= first_hour
+        hour_bits = int(game_hours.max()).bit_length()
+        # key = player, then hour, as bits.  Shifting back is cheaper than
+        # `divmod`.  Everything in place, these arrays are big.
+        keys = self.guesses['player'].astype(np.int64)
+        keys <<= hour_bits
+        keys |= game_hours[self.guesses['game']]
+        weights = self.guesses['count']
+        if int(keys.max()) < max(DENSE_MIN, DENSE_FACTOR * len(keys)):
+            # One dense counter per (player, hour) is much faster than sorting.
+            unique_keys = np.flatnonzero(np.bincount(keys))
+            counts = np.bincount(keys, weights=weights)[unique_keys].astype(np.int64)
+        else:
+            unique_keys, counts = _sum_by_key(keys, weights)
+        return unique_keys >> hour_bits, (unique_keys & ((1 << hour_bits) - 1)) + first_hour, counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directory')
+    parser.add_argument('--min-plays', type=int, default=3)
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        parser.error('{} is not a directory'.format(args.directory))
+
+    begin = time.perf_counter()
+    h = History(args.directory)
+    print('{} games, {} words, {} players'.format(len(h), len(h.words), len(h.players)))
+    print('Solve rate: {:.1%}'.format(h.solve_rate()))
+    print('Median reveals before a win: {}'.format(h.median_reveals_before_win()))
+    never = h.never_solved(args.min_plays)
+    print('{} words played at least {} times were never solved, e.g.: {}'.format(
+        len(never), args.min_plays, ', '.join(w for w, _ in never[:10])))
+    player_ids, hours, counts = h.guesses_per_player_per_hour()
+    if len(counts):
+        print('Guesses per player per active hour: mean {:.1f}, max {}'.format(counts.mean(), counts.max()))
+    print('(took {:.3f} s)'.format(time.perf_counter() - begin))
+
+
+if __name__ == '__main__':
+    main()
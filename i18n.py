@@ -0,0 +1,141 @@
+#!/bin/false
+# This is a library.
+
+"""
+Localization for outgoing messages.
+
+Catalogs are gettext `.mo` files, loaded once per language.  Every message
+becomes a "precompiled" template, which is just the bound `str.format` of
+the translated string, so rendering is a dict lookup and a `format` call.
+
+Most messages are about one thing that happened (a hint, a wrong guess),
+and go to one or more chats, possibly in different languages.  So instead
+of translating and formatting per send, build an `Event` once and ask it
+for the text of each language (or the combined multi-language text, like
+the uno bot's `__(..., multi=True)`).  Each distinct text is rendered once.
+
+>>> loc = Localizer('hangchat', localedir=None)
+>>> ev = loc.event(SORRY_WRONG, name='Anton', word='goop')
+>>> ev.text('en')
+'Anton: "goop" is wrong, sorry.'
+>>> ev.multi(['en', 'de']) is ev.multi(['en', 'de'])
+True
+"""
+
+import gettext
+import threading
+
+# Message IDs for the hangchat callbacks.
+GAME_STARTED = 'A new game has started! Guess the word.'
+PRIVATE_HINT = 'Your private hint: {hint}'
+PUBLIC_HINT = 'Hint: {hint}'
+SORRY_WRONG = '{name}: "{word}" is wrong, sorry.'
+GAME_WON = '{name} found the word: {word}'
+GAME_LOST = 'Nobody found the word: {word}'
+SLACKER = '{name}, you could have tried a bit harder.'
+
+DEFAULT_LANGUAGE = 'en'
+
+
+class Catalog:
+    """
+    All templates of one language.
+    """
+
+    def __init__(self, translations):
+        self.translations = translations
+        # msgid -> bound `str.format` of the translation
+        self.templates = dict()
+        # Precompile everything the catalog knows right away.  Messages it
+        # doesn't know are added on first use, see `template`.
+        for msgid, msgstr in getattr(translations, '_catalog', {}).items():
+            if isinstance(msgid, str) and msgid:
+                self.templates[msgid] = msgstr.format
+
+    def template(self, msgid):
+        template = self.templates.get(msgid)
+        if template is None:
+            template = self.templates[msgid] = self.translations.gettext(msgid).format
+        return template
+
+    def translate(self, msgid):
+        """
+        The raw translated string, without formatting.
+        """
+        return self.template(msgid).__self__
+
+
+class Localizer:
+    def __init__(self, domain, localedir, default_language=DEFAULT_LANGUAGE):
+        """
+        domain, localedir: See `gettext.translation`.
+        """
+        self.domain = domain
+        self.localedir = localedir
+        self.default_language = default_language
+        # language -> Catalog
+        self.catalogs = dict()
+        # (msgid, languages) -> bound `str.format` of the combined template
+        self.multi_templates = dict()
+        self.lock = threading.Lock()
+
+    def catalog(self, language):
+        catalog = self.catalogs.get(language)
+        if catalog is not None:
+            return catalog
+        with self.lock:
+            catalog = self.catalogs.get(language)
+            if catalog is None:
+                translations = gettext.translation(self.domain, self.localedir,
+                                                   languages=[language or self.default_language],
+                                                   fallback=True)
+                catalog = self.catalogs[language] = Catalog(translations)
+        return catalog
+
+    def render(self, language, msgid, **kwargs):
+        return self.catalog(language).template(msgid)(**kwargs)
+
+    def multi_template(self, msgid, languages):
+        """
+        One template that contains the message in all `languages`, one per
+        line, skipping duplicate translations.  Built once per combination.
+        """
+        key = (msgid, tuple(languages))
+        template = self.multi_templates.get(key)
+        if template is None:
+            lines = []
+            for language in languages:
+                line = self.catalog(language).translate(msgid)
+                if line not in lines:
+                    lines.append(line)
+            template = self.multi_templates[key] = '\n'.join(lines).format
+        return template
+
+    def event(self, msgid, **kwargs):
+        return Event(self, msgid, kwargs)
+
+
+class Event:
+    """
+    One message about one thing that happened, rendered at most once per
+    language (or combination of languages).
+    """
+
+    def __init__(self, localizer, msgid, kwargs):
+        self.localizer = localizer
+        self.msgid = msgid
+        self.kwargs = kwargs
+        self.texts = dict()
+
+    def text(self, language):
+        text = self.texts.get(language)
+        if text is None:
+            text = self.texts[language] = self.localizer.render(language, self.msgid, **self.kwargs)
+        return text
+
+    def multi(self, languages):
+        key = tuple(languages)
+        text = self.texts.get(key)
+        if text is None:
+            text = self.texts[key] = self.localizer.multi_template(self.msgid, key)(**self.kwargs)
+        return text
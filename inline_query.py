@@ -0,0 +1,114 @@
+#!/bin/false
+# This is a library.
+
+"""
+Inline-query answers for hangchat.
+
+Telegram clients fire an inline query on (nearly) every keystroke, but the
+answer only changes when the game does.  So instead of rebuilding the result
+list every time, we remember the last list per (player, game) together with
+the `GameState` and the version it was built for, and only rebuild once the
+version moves on (or a new game took over the same game ID).  A repeated
+query is then a single dict lookup.
+
+>>> import hangchat, inline_query
+>>> g = hangchat.GameFactory(['ahoy']).start(None, hangchat.DummyCallbacks(), ['Anton', 'Berta'])
+>>> cache = inline_query.InlineResultCache()
+>>> cache.get(g, 'Anton') is cache.get(g, 'Anton')
+True
+
+The results are plain dicts, so this doesn't need to know about `telegram`.
+Turning them into `InlineQueryResultArticle`s is the caller's job.
+"""
+
+import collections
+import weakref
+
+# Only the most recently used entries are kept.
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def build_results(game, player):
+    """
+    Builds the list of inline results that `player` sees for `game`.
+    The `id` of each result contains the game version, similar to the
+    'anti_cheat' counter of the uno bot, so stale results can be detected.
+    """
+    suffix = ':%d' % game.version
+    results = []
+    if not game.is_running:
+        results.append(dict(
+            id='gameover' + suffix,
+            title='Game over',
+            description='The word was {}'.format(game.word),
+        ))
+        return results
+
+    results.append(dict(
+        id='public' + suffix,
+        title='Public hint',
+        description=game.public_hint,
+    ))
+    private_hint = game.private_hints.get(player)
+    if private_hint is not None:
+        results.append(dict(
+            id='private' + suffix,
+            title='Your private hint',
+            description=private_hint,
+        ))
+    return results
+
+
+def _game_key(game):
+    # Without a game_id, the game is its own ID.  Don't let the key keep it alive.
+    if game.game_id is game:
+        return weakref.ref(game)
+    return game.game_id
+
+
+class InlineResultCache:
+    """
+    Caches prebuilt result lists per (player, game_id), invalidated by
+    `GameState.version`.  A new game with the same game ID (e.g. the next
+    round in the same chat) never sees the old game's results.
+
+    At most `max_entries` are kept, least recently used ones go first.  You
+    can also call `forget_game` from `AbstractCallbacks.game_ended`, once
+    nobody is going to look at the final results anymore.  Games are only
+    referenced weakly, so the cache never keeps an ended (or spilled) game
+    alive.
+    """
+
+    def __init__(self, build=build_results, max_entries=DEFAULT_MAX_ENTRIES):
+        self.build = build
+        self.max_entries = max_entries
+        # (player, game_id) -> (weakref to the game, version, results)
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, game, player):
+        key = (player, _game_key(game))
+        entry = self.entries.get(key)
+        # Versions restart at 0 for every game, so check the game, too.
+        if entry is not None and entry[0]() is game and entry[1] == game.version:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[2]
+
+        self.misses += 1
+        # Tuple, so that nobody accidentally appends to a cached list.
+        results = tuple(self.build(game, player))
+        self.entries[key] = (weakref.ref(game), game.version, results)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return results
+
+    def forget_game(self, game):
+        for player in game.player_guesses.keys():
+            key = (player, _game_key(game))
+            entry = self.entries.get(key)
+            # Don't throw away the entries of a newer game with the same ID.
+            if entry is not None and entry[0]() is game:
+                del self.entries[key]
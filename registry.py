@@ -0,0 +1,178 @@
+#!/bin/false
+# This is a library.
+
+"""
+Keeps track of the lobby or game of each chat, without keeping every chat
+that ever existed in RAM.
+
+Entries that haven't been touched for `ttl_s` seconds, or that exceed
+`max_resident` (least recently used first), are pickled into a `shelve`
+spill file and dropped from memory.  Running games are suspended first, so
+their timer stops.  The next `get` for that chat loads the entry back and
+resumes the game, which re-arms its timer.  Games that already ended are
+simply forgotten.
+
+>>> import hangchat, tempfile, os
+>>> tmp = tempfile.TemporaryDirectory()
+>>> cb = hangchat.DummyCallbacks()
+>>> reg = GameRegistry(cb, os.path.join(tmp.name, 'spill'), ttl_s=60, clock=lambda: now)
+>>> now = 0
+>>> reg.put(1234, hangchat.GameFactory(['ahoy']).start(None, cb, ['Anton', 'Berta']))
+>>> now = 100
+>>> reg.evict_idle()
+1
+>>> len(reg), reg.spilled_count()
+(0, 1)
+>>> reg.get(1234).word
+'ahoy'
+>>> reg.close()
+"""
+
+import collections
+import logging
+import shelve
+import threading
+import time
+
+import hangchat
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_S = 30 * 60
+DEFAULT_MAX_RESIDENT = 10_000
+
+
+class Lobby:
+    """
+    A game that hasn't started yet: just the players who joined so far.
+    """
+
+    def __init__(self, chat_id, owner):
+        self.chat_id = chat_id
+        self.owner = owner
+        self.players = [owner]
+
+    def join(self, player):
+        if player not in self.players:
+            self.players.append(player)
+
+    def leave(self, player):
+        if player in self.players:
+            self.players.remove(player)
+
+
+class GameRegistry:
+    def __init__(self, callbacks, spill_filename, ttl_s=DEFAULT_TTL_S, max_resident=DEFAULT_MAX_RESIDENT,
+                 clock=time.monotonic, on_evict=None):
+        """
+        callbacks: passed to `GameState.resume` when a game comes back from disk.
+        spill_filename: where evicted entries go.  See `shelve.open`.
+        clock: returns the current time in seconds.
+        on_evict: if set, called with the chat ID of every evicted chat, so
+            that other per-chat state can go, too.  E.g. `RoundPipeline.discard`.
+        """
+        self.callbacks = callbacks
+        self.ttl_s = ttl_s
+        self.max_resident = max_resident
+        self.clock = clock
+        self.on_evict = on_evict
+        # chat_id -> (last_used, lobby or game), least recently used first
+        self.resident = collections.OrderedDict()
+        self.spill = shelve.open(spill_filename)
+        # Both the dispatcher and the timer thread may get here.
+        self.lock = threading.RLock()
+        self.evictions = 0
+        self.reloads = 0
+
+    def __len__(self):
+        return len(self.resident)
+
+    def spilled_count(self):
+        with self.lock:
+            return len(self.spill)
+
+    def get(self, chat_id):
+        """
+        Returns the lobby or game of this chat, or `None`.
+        Counts as activity.
+        """
+        with self.lock:
+            entry = self.resident.get(chat_id)
+            if entry is not None:
+                self.resident[chat_id] = (self.clock(), entry[1])
+                self.resident.move_to_end(chat_id)
+                return entry[1]
+
+            key = repr(chat_id)
+            if key not in self.spill:
+                return None
+            value = self.spill[key]
+            del self.spill[key]
+            self.reloads += 1
+            if isinstance(value, hangchat.GameState):
+                value.resume(self.callbacks)
+            self._insert(chat_id, value)
+            return value
+
+    def put(self, chat_id, value):
+        """
+        value: a `Lobby` or a `GameState`.  Replaces whatever was there.
+        """
+        with self.lock:
+            self.spill.pop(repr(chat_id), None)
+            self._insert(chat_id, value)
+
+    def remove(self, chat_id):
+        with self.lock:
+            self.resident.pop(chat_id, None)
+            self.spill.pop(repr(chat_id), None)
+
+    def evict_idle(self):
+        """
+        Spills everything that has been idle for longer than `ttl_s`.
+        Returns how many entries were evicted.
+        """
+        evicted = 0
+        with self.lock:
+            deadline = self.clock() - self.ttl_s
+            while self.resident:
+                chat_id, (last_used, _) = next(iter(self.resident.items()))
+                if last_used > deadline:
+                    break
+                self._evict(chat_id)
+                evicted += 1
+        return evicted
+
+    def schedule_eviction(self, scheduler, interval_ms=60_000):
+        """
+        Runs `evict_idle` periodically on a `countdown.CountdownScheduler`.
+        """
+        def run():
+            try:
+                self.evict_idle()
+            finally:
+                scheduler.schedule(interval_ms, run)
+        scheduler.schedule(interval_ms, run)
+
+    def close(self):
+        with self.lock:
+            self.spill.close()
+
+    def _insert(self, chat_id, value):
+        self.resident[chat_id] = (self.clock(), value)
+        self.resident.move_to_end(chat_id)
+        while len(self.resident) > self.max_resident:
+            self._evict(next(iter(self.resident)))
+
+    def _evict(self, chat_id):
+        _, value = self.resident.pop(chat_id)
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(chat_id)
+        if isinstance(value, hangchat.GameState):
+            if not value.is_running:
+                # Nobody cares about ended games.
+                return
+            value.suspend()
+        self.spill[repr(chat_id)] = value
+        logger.debug('Spilled %r to disk', chat_id)
@@ -0,0 +1,166 @@
+#!/bin/false
+# This is a library.
+
+"""
+Continuous play: while a round is running, the next one is already being
+prepared in the background (see `hangchat.PreparedRound`), and when the
+round ends, the next one starts right away and all its first messages go
+out in one concurrent burst.
+
+>>> import hangchat
+>>> gf = hangchat.GameFactory(['ahoy', 'hell', 'cool', 'cody'])
+>>> pipeline = RoundPipeline(gf)
+>>> g = pipeline.start_next('chat', hangchat.DummyCallbacks(), ['Anton', 'Berta'])
+>>> g.call_abort_game()  # Or someone wins, or the hints run out.
+>>> g = pipeline.start_next('chat', hangchat.DummyCallbacks(), ['Anton', 'Berta'])
+>>> pipeline.hits
+1
+
+After a reload, rounds prepared from the old dictionary are no good anymore:
+
+>>> g.call_abort_game()
+>>> pipeline.pending['chat'].result().word in ['ahoy', 'hell', 'cool', 'cody']
+True
+>>> gf.set_wordlist(['hello'])
+>>> g = pipeline.start_next('chat', hangchat.DummyCallbacks(), ['Anton', 'Berta'])
+>>> g.word, pipeline.hits, pipeline.misses
+('hello', 1, 2)
+>>> pipeline.shutdown()
+"""
+
+import concurrent.futures
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEND_WORKERS = 8
+
+
+class RoundPipeline:
+    """
+    Keeps one prepared next round per key (usually the chat ID).  Call
+    `discard` once a chat goes idle, e.g. as `GameRegistry`'s `on_evict`.
+    """
+
+    def __init__(self, factory, executor=None):
+        """
+        executor: where to prepare rounds.  By default, a single background thread.
+        """
+        self.factory = factory
+        self.own_executor = executor is None
+        self.executor = executor or concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                                          thread_name_prefix='prepare')
+        # key -> Future of a `PreparedRound`
+        self.pending = dict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def prepare_next(self, key, players):
+        """
+        Starts preparing the next round for `key`, replacing whatever was
+        prepared before.
+        """
+        future = self.executor.submit(self.factory.prepare, players)
+        with self.lock:
+            old = self.pending.get(key)
+            self.pending[key] = future
+        if old is not None:
+            old.cancel()
+
+    def discard(self, key):
+        with self.lock:
+            future = self.pending.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def start_next(self, game_id, callbacks, players, key=None):
+        """
+        Starts a game, using the prepared round for `key` (default: `game_id`)
+        if there is one that fits.  Then immediately starts preparing the
+        round after that, with the same players.
+        """
+        if key is None:
+            key = game_id
+        with self.lock:
+            future = self.pending.pop(key, None)
+        prepared = None
+        if future is not None:
+            try:
+                prepared = future.result()
+            except Exception:
+                logger.exception('Preparing the next round for %r failed', key)
+        if prepared is not None and prepared.fits(players, self.factory.dictionary):
+            self.hits += 1
+        else:
+            self.misses += 1
+            prepared = None
+        game = self.factory.start(game_id, callbacks, players, prepared=prepared)
+        self.prepare_next(key, players)
+        return game
+
+    def shutdown(self):
+        with self.lock:
+            futures = list(self.pending.values())
+            self.pending.clear()
+        for future in futures:
+            future.cancel()
+        if self.own_executor:
+            self.executor.shutdown(wait=True)
+
+
+class BatchSender:
+    """
+    Sends many messages concurrently instead of one after the other.
+    `send` is whatever actually sends a single message, e.g. a wrapper
+    around `bot.send_message(chat_id, text)`; it's called from worker threads.
+    """
+
+    def __init__(self, send, workers=DEFAULT_SEND_WORKERS):
+        self.send = send
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='send')
+
+    def send_all(self, messages, wait=False):
+        """
+        messages: iterable of (target, text).
+        If `wait`, blocks until everything is sent, and returns how many failed.
+        """
+        futures = [self.executor.submit(self._send_one, target, text) for target, text in messages]
+        if not wait:
+            return None
+        return sum(not f.result() for f in futures)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+    def _send_one(self, target, text):
+        try:
+            self.send(target, text)
+            return True
+        except Exception:
+            logger.exception('Sending to %r failed', target)
+            return False
+
+
+class BatchedCallbacksMixin:
+    """
+    Sends the first hints of a game through a `BatchSender`, all at once.
+    Mix into an `AbstractCallbacks` implementation that provides
+    `self.sender`, `private_target(game_id, player)`,
+    `public_target(game_id)`, and `format_private_hint` /
+    `format_public_hint` (each taking the hint, returning the text).
+    """
+
+    def send_first_hints(self, game_id, private_hints, public_hint):
+        messages = [(self.private_target(game_id, player), self.format_private_hint(hint))
+                    for player, hint in private_hints.items()]
+        messages.append((self.public_target(game_id), self.format_public_hint(public_hint)))
+        self.sender.send_all(messages)
+
+    def broadcast_public_hint(self, game_ids, hint):
+        """
+        Same hint for many games, formatted once.  See `tournament`.
+        """
+        text = self.format_public_hint(hint)
+        self.sender.send_all([(self.public_target(game_id), text) for game_id in game_ids])
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+"""
+Offline Monte Carlo simulation, to tune `timeout_ms` and to find out how
+hard each word is.
+
+Each simulated game is a real `GameState`, played by `solver` players on a
+virtual clock: timers and the players' "thinking" are events in a
+`countdown.CountdownScheduler` that never sleeps.  Chunks of games run in a
+`ProcessPoolExecutor`, and the per-game outcomes come back as NumPy arrays.
+
+Usage: ./simulate.py DICTIONARY [--games N] [--timeouts 10000,20000,...] [--out difficulty.tsv]
+
+The resulting file can be loaded back with `hangchat.read_difficulty` and
+`GameFactory.set_difficulty`.
+
+The recommendation is only as good as the player model.  Solvers that
+filter the whole dictionary perfectly (`--recall 1`) solve nearly
+everything after one or two hints, so for them the recommended timeout is
+merely a lower bound.  By default, a solver only thinks of each candidate
+some of the time (`DEFAULT_RECALL`), so longer timeouts, i.e. more looks
+per hint, actually help.  Tune `--recall` and `--think-ms` until the
+simulated solve rate matches what real chats achieve.
+"""
+
+import argparse
+import concurrent.futures
+import random
+
+import numpy as np
+
+import countdown
+import hangchat
+import solver
+
+DEFAULT_TIMEOUTS_MS = [5_000, 10_000, 20_000, 30_000, 60_000, 120_000]
+DEFAULT_THINK_MS = 15_000
+DEFAULT_TARGET_SOLVE_RATE = 0.8
+# See `solver.SolverPlayer`.
+DEFAULT_RECALL = 0.1
+CHUNK_SIZE = 5_000
+
+# Set up once per worker process by `_init_worker`.
+_word_list = None
+_folded_list = None
+_index = None
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SimCallbacks(countdown.ScheduledCallbacks, solver.SolverCallbacks):
+    """
+    Solvers that take their time: each one looks at the game every now and
+    then (exponentially distributed, `think_ms` on average), and guesses if
+    it has a guess.
+    """
+
+    def __init__(self, scheduler, index, players, rng, think_ms, threshold, recall):
+        countdown.ScheduledCallbacks.__init__(self, scheduler)
+        solver.SolverCallbacks.__init__(self, index, players, rng, threshold, recall)
+        self.rng = rng
+        self.think_ms = think_ms
+        self.game = None
+
+    def timer_fired(self, game_id, action_data, timer_id):
+        if self.game.is_running:
+            self.game.run_timer(action_data, timer_id)
+
+    def schedule_look(self, player):
+        self.scheduler.schedule(self.rng.expovariate(1 / self.think_ms), self.look, player)
+
+    def look(self, player):
+        if not self.game.is_running:
+            return
+        guess = self.solvers[player].next_guess()
+        if guess is not None:
+            self.game.call_guess(player, guess)
+        if self.game.is_running:
+            self.schedule_look(player)
+
+
+def simulate_game(word_index, timeout_ms, n_players, rng, think_ms, threshold, recall):
+    """
+    Plays a single game in the current worker.
+    Returns (solved, reveals, hidden_letters, duration_ms, guesses).
+    """
+    clock = VirtualClock()
+    scheduler = countdown.CountdownScheduler(clock=clock)
+    players = list(range(n_players))
+    callbacks = SimCallbacks(scheduler, _index, players, rng, think_ms, threshold, recall)
+    game = hangchat.GameState('sim', callbacks, players, _word_list[word_index], timeout_ms,
+                              folded_word=_folded_list[word_index])
+    callbacks.game = game
+    for player in players:
+        callbacks.schedule_look(player)
+
+    while game.is_running:
+        clock.now = scheduler.next_deadline()
+        scheduler.run_pending(clock.now)
+
+    hidden = sum(1 for c in game.word if c not in hangchat.SEPARATORS)
+    return (callbacks.winner is not None, game.reveal_count(), hidden, clock.now * 1000,
+            sum(game.player_guesses.values()))
+
+
+def _init_worker(word_list, folded_list):
+    global _word_list, _folded_list, _index
+    _word_list = word_list
+    _folded_list = folded_list
+    _index = solver.SolverIndex(word_list)
+
+
+def _simulate_chunk(seed, n_games, timeout_ms, n_players, think_ms, threshold, recall):
+    rng = random.Random(seed)
+    word_ids = np.empty(n_games, dtype=np.int32)
+    solved = np.empty(n_games, dtype=np.bool_)
+    reveals = np.empty(n_games, dtype=np.int16)
+    hidden = np.empty(n_games, dtype=np.int16)
+    duration_ms = np.empty(n_games, dtype=np.float32)
+    guesses = np.empty(n_games, dtype=np.int32)
+    for i in range(n_games):
+        word_ids[i] = rng.randrange(len(_word_list))
+        (solved[i], reveals[i], hidden[i], duration_ms[i], guesses[i]) = simulate_game(
+            int(word_ids[i]), timeout_ms, n_players, rng, think_ms, threshold, recall)
+    return word_ids, solved, reveals, hidden, duration_ms, guesses
+
+
+class SimulationResult:
+    """
+    Outcome of all simulated games for one timeout.  Per-game arrays, plus
+    per-word aggregates (indexed like the word list).
+    """
+
+    def __init__(self, timeout_ms, n_words, chunks):
+        self.timeout_ms = timeout_ms
+        columns = list(zip(*chunks))
+        (self.word_ids, self.solved, self.reveals, self.hidden, self.duration_ms,
+         self.guesses) = [np.concatenate(c) for c in columns]
+
+        # Failures count as "everything revealed".
+        fraction = np.where(self.solved, self.reveals / np.maximum(self.hidden, 1), 1.0)
+        self.plays = np.bincount(self.word_ids, minlength=n_words)
+        self.solves = np.bincount(self.word_ids, weights=self.solved, minlength=n_words)
+        self.reveals_sum = np.bincount(self.word_ids, weights=self.reveals, minlength=n_words)
+        self.fraction_sum = np.bincount(self.word_ids, weights=fraction, minlength=n_words)
+
+    def solve_rate(self):
+        return float(self.solved.mean())
+
+    def median_duration_ms(self):
+        return float(np.median(self.duration_ms))
+
+    def mean_reveals_to_solve(self):
+        return float(self.reveals[self.solved].mean()) if self.solved.any() else float('nan')
+
+    def difficulty(self):
+        """
+        Per word: average fraction of the word that got revealed before
+        someone solved it, with failures counting as 1.  NaN if never played.
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.fraction_sum / self.plays
+
+
+def run(word_list, games, timeouts_ms, n_players=3, think_ms=DEFAULT_THINK_MS,
+        threshold=solver.DEFAULT_GUESS_THRESHOLD, workers=None, seed=0, recall=DEFAULT_RECALL):
+    """
+    Simulates `games` games for each timeout.  Returns a list of
+    `SimulationResult`, in the order of `timeouts_ms`.
+    """
+    word_list = [hangchat.clean_word(w) for w in word_list]
+    folded_list = [hangchat.DEFAULT_NORMALIZER.fold(w) for w in word_list]
+    seeds = np.random.SeedSequence(seed)
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(word_list, folded_list)) as pool:
+        for timeout_ms in timeouts_ms:
+            sizes = [CHUNK_SIZE] * (games // CHUNK_SIZE)
+            if games % CHUNK_SIZE:
+                sizes.append(games % CHUNK_SIZE)
+            chunk_seeds = seeds.spawn(len(sizes))
+            futures = [pool.submit(_simulate_chunk, int(s.generate_state(1)[0]), size, timeout_ms,
+                                   n_players, think_ms, threshold, recall)
+                       for s, size in zip(chunk_seeds, sizes)]
+            chunks = [f.result() for f in futures]
+            results.append(SimulationResult(timeout_ms, len(word_list), chunks))
+    return results
+
+
+def recommend_timeout(results, target_solve_rate=DEFAULT_TARGET_SOLVE_RATE):
+    """
+    The shortest timeout that still lets the players solve at least
+    `target_solve_rate` of the games.  Longer timeouts just drag the game on.
+    Returns `None` if no timeout is good enough.  With perfect solvers
+    (`recall=1`), this is only a lower bound; see the module docstring.
+    """
+    good = [r for r in results if r.solve_rate() >= target_solve_rate]
+    if not good:
+        return None
+    return min(good, key=lambda r: r.timeout_ms)
+
+
+def write_difficulty(filename, word_list, result):
+    scores = result.difficulty()
+    with open(filename, 'w') as fp:
+        fp.write('# word\tdifficulty\tplays\tsolves (timeout_ms={})\n'.format(result.timeout_ms))
+        for word, score, plays, solves in zip(word_list, scores, result.plays, result.solves):
+            if plays:
+                fp.write('{}\t{:.4f}\t{}\t{}\n'.format(word, score, plays, int(solves)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('dictionary')
+    parser.add_argument('--games', type=int, default=100_000)
+    parser.add_argument('--timeouts', default=','.join(str(t) for t in DEFAULT_TIMEOUTS_MS))
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--think-ms', type=float, default=DEFAULT_THINK_MS)
+    parser.add_argument('--threshold', type=int, default=solver.DEFAULT_GUESS_THRESHOLD)
+    parser.add_argument('--recall', type=float, default=DEFAULT_RECALL,
+                        help='chance that a player thinks of a candidate word when looking at the hints')
+    parser.add_argument('--target', type=float, default=DEFAULT_TARGET_SOLVE_RATE)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='difficulty.tsv')
+    args = parser.parse_args()
+
+    word_list = hangchat.read_cleaned_dict(args.dictionary)
+    timeouts_ms = [int(t) for t in args.timeouts.split(',')]
+    results = run(word_list, args.games, timeouts_ms, args.players, args.think_ms,
+                  args.threshold, args.workers, args.seed, args.recall)
+
+    print('timeout_ms  solve_rate  median_duration_s  reveals_to_solve')
+    for r in results:
+        print('{:>10}  {:>10.1%}  {:>17.1f}  {:>16.2f}'.format(
+            r.timeout_ms, r.solve_rate(), r.median_duration_ms() / 1000, r.mean_reveals_to_solve()))
+
+    best = recommend_timeout(results, args.target)
+    if best is None:
+        print('No timeout reaches a solve rate of {:.0%}; using the longest one for difficulty scores.'.format(
+            args.target))
+        best = max(results, key=lambda r: r.timeout_ms)
+    else:
+        print('Recommended timeout_ms: {}'.format(best.timeout_ms))
+    write_difficulty(args.out, word_list, best)
+    print('Wrote difficulty scores to {}'.format(args.out))
+
+
+if __name__ == '__main__':
+    main()
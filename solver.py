@@ -0,0 +1,208 @@
+#!/bin/false
+# This is a library.
+
+"""
+Automated players, for self-play and load testing.
+
+A `SolverPlayer` only knows what a human player would know: its private
+hint, the public hints, and everyone's wrong guesses.  It narrows down the
+dictionary with a `SolverIndex`, and guesses once few enough candidates are
+left.  Like a human, it doesn't guess while it has no idea.
+
+The index groups words by their 'shape' (length and separator positions,
+i.e. the very first public hint) and stores, per shape and per (position,
+character), a bitmask of the matching words.  Narrowing down is then a
+few big-int ANDs, so thousands of solvers fit on a single core.
+
+>>> import hangchat, random
+>>> gf = hangchat.GameFactory(['ahoy', 'hell', 'cool', 'cody'])
+>>> index = SolverIndex.from_factory(gf)
+>>> cb = SolverCallbacks(index, ['Anton', 'Berta'], random.Random(1))
+>>> game = gf.start(None, cb, ['Anton', 'Berta'])
+>>> play_out(game, cb)
+>>> cb.winner in (None, 'Anton', 'Berta')
+True
+"""
+
+import hangchat
+
+# Guess only if at most this many candidates are left.
+DEFAULT_GUESS_THRESHOLD = 3
+# Chance to think of each candidate whenever the solver looks at the game.
+# 1.0 is a walking dictionary.
+DEFAULT_RECALL = 1.0
+
+
+def _shape_of(hint):
+    return ''.join(c if c in hangchat.SEPARATORS else '_' for c in hint)
+
+
+class SolverIndex:
+    def __init__(self, word_list):
+        """
+        word_list: cleaned words, e.g. `GameFactory.word_list`.
+        """
+        # shape -> list of words with that shape
+        self.words = dict()
+        # shape -> {(position, char): bitmask over `self.words[shape]`}
+        self.masks = dict()
+        # shape -> bitmask with all words set
+        self.all_masks = dict()
+        # word -> (shape, bit)
+        self.lookup = dict()
+
+        positions = dict()  # shape -> {(position, char): [local ids]}
+        for word in word_list:
+            if word in self.lookup:
+                continue
+            shape = _shape_of(word)
+            shape_words = self.words.setdefault(shape, [])
+            local_id = len(shape_words)
+            shape_words.append(word)
+            self.lookup[word] = (shape, 1 << local_id)
+            shape_positions = positions.setdefault(shape, dict())
+            for i, c in enumerate(word):
+                if c not in hangchat.SEPARATORS:
+                    shape_positions.setdefault((i, c), []).append(local_id)
+
+        # Build the bitmasks through bytes; or-ing bits into a growing int one
+        # by one would be quadratic.
+        for shape, shape_positions in positions.items():
+            size = len(self.words[shape])
+            self.all_masks[shape] = (1 << size) - 1
+            shape_masks = dict()
+            for key, local_ids in shape_positions.items():
+                bits = bytearray((size + 7) // 8)
+                for local_id in local_ids:
+                    bits[local_id >> 3] |= 1 << (local_id & 7)
+                shape_masks[key] = int.from_bytes(bits, 'little')
+            self.masks[shape] = shape_masks
+
+    @staticmethod
+    def from_factory(factory):
+        return SolverIndex(factory.word_list)
+
+    def __len__(self):
+        return len(self.lookup)
+
+
+class SolverPlayer:
+    def __init__(self, index, rng, threshold=DEFAULT_GUESS_THRESHOLD, recall=DEFAULT_RECALL):
+        """
+        index: `SolverIndex` of the dictionary the game uses.
+        rng: e.g. a `random.Random`.  No need for `secrets` here.
+        recall: chance that the solver thinks of any given candidate when
+            asked for a guess.  Humans don't have the whole dictionary in
+            their head, but looking at the hints a bit longer helps.
+        """
+        self.index = index
+        self.rng = rng
+        self.threshold = threshold
+        self.recall = recall
+        self.reset()
+
+    def reset(self):
+        """
+        Forget everything about the previous game.
+        """
+        self.shape = None
+        self.mask = 0
+        self.known = set()
+
+    def observe_hint(self, hint):
+        if self.shape is None:
+            self.shape = _shape_of(hint)
+            self.mask = self.index.all_masks.get(self.shape, 0)
+        shape_masks = self.index.masks.get(self.shape, {})
+        for i, c in enumerate(hint):
+            if c == '_' or c in hangchat.SEPARATORS or (i, c) in self.known:
+                continue
+            self.known.add((i, c))
+            self.mask &= shape_masks.get((i, c), 0)
+
+    def observe_wrong(self, word):
+        entry = self.index.lookup.get(word)
+        if entry is not None and entry[0] == self.shape:
+            self.mask &= ~entry[1]
+
+    def candidate_count(self):
+        return self.mask.bit_count()
+
+    def next_guess(self):
+        """
+        Returns a word to guess, or `None` if we don't have a clue (yet).
+        """
+        if self.shape is None or not 0 < self.mask.bit_count() <= self.threshold:
+            return None
+        candidates = []
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            candidates.append(low.bit_length() - 1)
+            mask ^= low
+        if self.recall < 1.0:
+            candidates = [c for c in candidates if self.rng.random() < self.recall]
+            if not candidates:
+                return None
+        return self.index.words[self.shape][self.rng.choice(candidates)]
+
+
+class SolverCallbacks(hangchat.AbstractCallbacks):
+    """
+    Callbacks that feed everything a human would see into `SolverPlayer`s.
+    Timers are only counted, like `DummyCallbacks`; whoever drives the game
+    decides when they fire.  See `play_out`.
+    """
+
+    def __init__(self, index, players, rng, threshold=DEFAULT_GUESS_THRESHOLD, recall=DEFAULT_RECALL):
+        self.solvers = {p: SolverPlayer(index, rng, threshold, recall) for p in players}
+        self.counter = 0
+        self.winner = None
+
+    def reset(self):
+        for solver in self.solvers.values():
+            solver.reset()
+        self.winner = None
+
+    def game_started(self, game_id):
+        pass
+
+    def send_private_hint(self, game_id, player, hint):
+        self.solvers[player].observe_hint(hint)
+
+    def send_sorry_wrong(self, game_id, player, wrong_word):
+        for solver in self.solvers.values():
+            solver.observe_wrong(wrong_word)
+
+    def send_public_hint(self, game_id, hint):
+        for solver in self.solvers.values():
+            solver.observe_hint(hint)
+
+    def game_ended(self, game_id, word, winner_or_none, slacker_or_none):
+        self.winner = winner_or_none
+
+    def set_timer(self, game_id, milliseconds, action_data):
+        self.counter += 1
+        return self.counter
+
+    def remove_timer(self, game_id, timer_id):
+        pass
+
+
+def play_out(game, callbacks):
+    """
+    Lets the solvers play `game` until it ends: everyone who has a guess
+    makes it; once nobody has one, the timer fires.
+    """
+    while game.is_running:
+        guessed = False
+        for player, solver in callbacks.solvers.items():
+            guess = solver.next_guess()
+            if guess is None:
+                continue
+            guessed = True
+            game.call_guess(player, guess)
+            if not game.is_running:
+                return
+        if not guessed:
+            game.run_timer(None, game.last_timer)
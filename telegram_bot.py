@@ -4,8 +4,14 @@
 
 import json
 import logging
+import signal
 
-from telegram.ext import Updater, CommandHandler, MessageHandler, Filters
+import dict_cache
+import hangchat
+import watchdog
+
+# Note: `telegram.ext` is imported lazily in `main()`.  It's by far the
+# slowest import, and nothing needs it before we actually talk to Telegram.
 
 # Enable logging
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -13,6 +19,14 @@ logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s
 
 logger = logging.getLogger(__name__)
 
+CONFIG_FILE = 'config.json'
+
+# Set by `main()`.  Use `dictionary.factory()` to get the `GameFactory`; it
+# waits for the dictionary if it's still loading.
+config = None
+dictionary = None
+reloader = None
+
 
 # Define a few command handlers. These usually take the two arguments update and
 # context. Error handlers also receive the raised TelegramError object in error.
@@ -31,27 +45,120 @@ def echo(update, context):
     update.message.reply_text(update.message.text)
 
 
+def reload_command(update, context):
+    """Reload config and dictionary when an admin issues /reload."""
+    if update.effective_user.id not in config['admins']:
+        update.message.reply_text('Only admins can do that.')
+        return
+
+    def on_done(result):
+        if isinstance(result, Exception):
+            update.message.reply_text('Reload failed: {}'.format(result))
+        else:
+            update.message.reply_text('Reloaded {} words.'.format(len(result)))
+
+    if reload(on_done):
+        update.message.reply_text('Reloading in the background. Running games are not affected.')
+    else:
+        update.message.reply_text('Cannot reload right now, see log.')
+
+
 def error(update, context):
     """Log Errors caused by Updates."""
     logger.warning('Update "%s" caused error "%s"', update, context.error)
 
 
+def read_config():
+    with open(CONFIG_FILE, 'r') as fp:
+        return json.load(fp)
+
+
+def load_dictionary(config):
+    """Start loading the dictionary in the background."""
+    global dictionary
+    dictionary = dict_cache.DictionaryLoader(config['dictionary'],
+                                             cache_dir=config.get('cache_dir'),
+                                             timeout_ms=config.get('timeout_ms'),
+                                             normalizer=hangchat.Normalizer.from_config(
+                                                 config.get('normalization', {})))
+    dictionary.start()
+    return dictionary
+
+
+def reload(on_done=None):
+    """
+    Re-read the config, and rebuild the dictionary in the background.
+    Running games keep going.  Returns whether a reload was started.
+    The new config only takes effect once the dictionary is rebuilt; if
+    that fails, everything stays as it was.
+    """
+    global reloader
+    try:
+        new_config = read_config()
+        filename = new_config['dictionary']
+        normalizer = hangchat.Normalizer.from_config(new_config.get('normalization', {}))
+        timeout_ms = new_config.get('timeout_ms')
+        if timeout_ms is not None:
+            timeout_ms = int(timeout_ms)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning('Not reloading, bad config in %s: %r', CONFIG_FILE, e)
+        return False
+    if not dictionary.is_ready():
+        logger.warning('Not reloading, the dictionary is still loading')
+        return False
+    factory = dictionary.factory()
+    if reloader is None:
+        reloader = dict_cache.DictionaryReloader(factory)
+
+    def commit(result):
+        global config
+        if not isinstance(result, Exception):
+            # The token can't change without a restart, but everything else can.
+            config = new_config
+            if timeout_ms is not None:
+                factory.set_default_timeout_ms(timeout_ms)
+        if on_done is not None:
+            on_done(result)
+
+    if not reloader.reload(filename, cache_dir=new_config.get('cache_dir'), normalizer=normalizer,
+                           on_done=commit):
+        logger.warning('Not reloading, another reload is still running')
+        return False
+    return True
+
+
+def handle_sighup(signum, frame):
+    logger.info('Got SIGHUP, reloading')
+    reload()
+
+
 def main():
     """Start the bot."""
-    with open('config.json', 'r') as fp:
-        config = json.load(fp)
-    
+    global config
+    config = read_config()
+
+    # Kick this off first, so that it overlaps with importing `telegram`.
+    load_dictionary(config)
+    signal.signal(signal.SIGHUP, handle_sighup)
+
+    from telegram.ext import Updater, CommandHandler, MessageHandler, Filters
+
     updater = Updater(config['token'], use_context=True)
 
     # Get the dispatcher to register handlers
     dp = updater.dispatcher
 
+    # Complain loudly (with a stack trace) about handlers that take too long.
+    stalls = watchdog.StallWatchdog(config.get('stall_threshold_s', watchdog.DEFAULT_STALL_THRESHOLD_S))
+    stalls.start()
+
     # on different commands - answer in Telegram
-    dp.add_handler(CommandHandler("start", start))
-    dp.add_handler(CommandHandler("help", help))
+    dp.add_handler(CommandHandler("start", stalls.watched(start)))
+    dp.add_handler(CommandHandler("help", stalls.watched(help)))
+    dp.add_handler(CommandHandler("reload", stalls.watched(reload_command)))
 
     # on noncommand i.e message - echo the message on Telegram
-    dp.add_handler(MessageHandler(Filters.text, echo))
+    dp.add_handler(MessageHandler(Filters.text, stalls.watched(echo)))
 
     # log all errors
     dp.add_error_handler(error)
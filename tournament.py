@@ -0,0 +1,198 @@
+#!/bin/false
+# This is a library.
+
+"""
+Tournament mode: many chats play the same word at the same time.
+
+A single `MasterRound` owns the word, the hint board and the one and only
+timer.  Every public hint is computed once and broadcast to all chats that
+haven't solved it yet.  Each chat only has a `ChatView`, which counts its
+players' guesses.  The first correct guess of each chat puts that chat into
+the global ranking; the round ends once every chat solved it, or the hints
+run out.
+
+Private hints are picked once per "slot": the first player of every chat
+gets the hint of slot 0, the second one that of slot 1, and so on.
+
+Unlike in a normal game, a guess doesn't reset the timer, since the timer
+is shared by everyone.
+
+>>> import hangchat
+>>> gf = hangchat.GameFactory(['ahoy'])
+>>> cb = TournamentPrintCallbacks()
+>>> r = MasterRound('cup', cb, gf, {'chat1': ['Anton', 'Berta'], 'chat2': ['Caesar', 'Dora']})  # doctest: +ELLIPSIS
+game_started chat1
+...
+set_timer cup 30000 None -> 1
+>>> r.call_guess('chat2', 'Caesar', 'AHOY')
+chat_solved chat2 Caesar 1
+>>> r.call_guess('chat1', 'Berta', 'ahoy')
+chat_solved chat1 Berta 2
+remove_timer cup 1
+game_ended chat1 ahoy Berta None
+game_ended chat2 ahoy Caesar None
+tournament_ended cup ahoy [(1, 'chat2', 'Caesar', 0), (2, 'chat1', 'Berta', 0)]
+"""
+
+import threading
+
+import hangchat
+
+
+class AbstractTournamentCallbacks(hangchat.AbstractCallbacks):
+    """
+    Like `AbstractCallbacks`, but `game_id` is the chat ID for everything
+    that concerns a single chat, and the tournament ID for the timer.
+    """
+
+    def broadcast_public_hint(self, chat_ids, hint):
+        """
+        By default, just calls `send_public_hint` for each chat.  Override
+        it (e.g. with `rounds.BatchedCallbacksMixin`) to send in one burst.
+        """
+        for chat_id in chat_ids:
+            self.send_public_hint(chat_id, hint)
+
+    def chat_solved(self, chat_id, winner, rank):
+        """
+        Someone in this chat found the word.  Don't reveal the word yet,
+        the other chats are still guessing.
+        """
+        raise NotImplementedError()
+
+    def tournament_ended(self, tournament_id, word, ranking):
+        """
+        ranking: see `MasterRound.ranking`.
+        """
+        raise NotImplementedError()
+
+
+class TournamentPrintCallbacks(AbstractTournamentCallbacks, hangchat.PrintCallbacks):
+    def chat_solved(self, chat_id, winner, rank):
+        print('chat_solved', chat_id, winner, rank)
+
+    def tournament_ended(self, tournament_id, word, ranking):
+        print('tournament_ended', tournament_id, word, ranking)
+
+
+class ChatView:
+    """
+    What a single chat contributes to a tournament.
+    """
+
+    def __init__(self, chat_id, players):
+        self.chat_id = chat_id
+        self.player_guesses = {p: 0 for p in players}
+        # This can fail if a player occurs twice.  See `GameState`.
+        assert len(self.player_guesses) == len(players), (self.player_guesses, players)
+        self.winner = None
+
+
+class MasterRound:
+    def __init__(self, tournament_id, callbacks, factory, chats, timeout_ms=None):
+        """
+        tournament_id: arbitrary, passed back to the timer callbacks.
+        callbacks: instance of `AbstractTournamentCallbacks`.
+        factory: the `GameFactory` to pick the word from.
+        chats: dict from chat ID to the list of players in that chat.
+        timeout_ms: defaults to the factory's.
+        """
+        self.tournament_id = tournament_id
+        self.callbacks = callbacks
+        self.timeout_ms = timeout_ms if timeout_ms is not None else factory.timeout_ms
+        self.views = {chat_id: ChatView(chat_id, players) for chat_id, players in chats.items()}
+        # Chats that haven't found the word yet.
+        self.active = set(self.views.keys())
+        # List of (rank, chat_id, winner, reveals), best first.
+        self.ranking = []
+        self.is_running = True
+        self.last_timer = None
+        # Guesses come in from all chats at once.
+        self.lock = threading.RLock()
+
+        slots = max((len(view.player_guesses) for view in self.views.values()), default=0)
+        prepared = factory.prepare(range(slots))
+        prepared.used = True
+        self.word = prepared.word
+        self.folded_word = prepared.folded_word
+        self.normalizer = prepared.normalizer
+        self.board = prepared.board
+        self.public_hint = prepared.public_hint
+
+        for chat_id, view in self.views.items():
+            callbacks.game_started(chat_id)
+            private_hints = {player: prepared.private_hints[slot]
+                             for slot, player in enumerate(view.player_guesses.keys())}
+            for player, hint in private_hints.items():
+                callbacks.send_private_hint(chat_id, player, hint)
+        callbacks.broadcast_public_hint(list(self.views.keys()), self.public_hint)
+        self._set_timer()
+
+    def call_guess(self, chat_id, player, guessed_word):
+        with self.lock:
+            view = self.views[chat_id]
+            if not self.is_running or view.winner is not None:
+                # Too late; this chat (or everyone) is done already.
+                return
+            assert player in view.player_guesses, (player, view.player_guesses)
+            view.player_guesses[player] += 1
+
+            if self.normalizer.fold(guessed_word) != self.folded_word:
+                self.callbacks.send_sorry_wrong(chat_id, player, hangchat.clean_word(guessed_word))
+                return
+
+            view.winner = player
+            self.active.discard(chat_id)
+            rank = len(self.ranking) + 1
+            self.ranking.append((rank, chat_id, player, self.reveal_count()))
+            self.callbacks.chat_solved(chat_id, player, rank)
+            if not self.active:
+                self._clear_timer()
+                self._end()
+
+    def call_abort_game(self):
+        with self.lock:
+            assert self.is_running
+            self._clear_timer()
+            self._end()
+
+    def run_timer(self, action_data, timer_id):
+        """
+        See `GameState.run_timer`.
+        """
+        with self.lock:
+            if not self.is_running or self.last_timer != timer_id:
+                # Raced with the end of the round, or with a reset.
+                return
+            self.last_timer = None
+
+            hint_index = self.board.pick()
+            self.board.set_state(hint_index, hangchat.STATE_PUBLIC_REVEALED)
+            if self.board.hidden_count() == 0:
+                # Don't reveal the last letter, see `GameState.run_timer`.
+                self._end()
+                return
+
+            # Computed once, no matter how many chats are still playing.
+            self.public_hint = self.board.public_hint()
+            self.callbacks.broadcast_public_hint(sorted(self.active, key=repr), self.public_hint)
+            self._set_timer()
+
+    def reveal_count(self):
+        return self.board.state_counts[hangchat.STATE_PUBLIC_REVEALED]
+
+    def _end(self):
+        self.is_running = False
+        for chat_id, view in self.views.items():
+            self.callbacks.game_ended(chat_id, self.word, view.winner,
+                                      hangchat.determine_slacker(view.player_guesses))
+        self.callbacks.tournament_ended(self.tournament_id, self.word, list(self.ranking))
+
+    def _clear_timer(self):
+        if self.last_timer is not None:
+            self.callbacks.remove_timer(self.tournament_id, self.last_timer)
+            self.last_timer = None
+
+    def _set_timer(self):
+        self._clear_timer()
+        self.last_timer = self.callbacks.set_timer(self.tournament_id, self.timeout_ms, None)
@@ -0,0 +1,203 @@
+#!/bin/false
+# This is a library.
+
+"""
+Notices when the bot falls behind, before the players do.
+
+Two things are watched:
+
+- Timer lag: how late timers fire compared to their deadline.
+  `GameState` reports this through `AbstractCallbacks.report_timer_lag`,
+  and `countdown.CountdownScheduler` through its `on_lag` argument.  Feed
+  only one of them into a `LagHistogram`, or every hint timer counts twice.
+  The scheduler sees all of its timers; the callbacks only see game timers,
+  but work with any timer implementation.
+- Stalls: a handler that runs for longer than `threshold_s`.  Wrap handlers
+  with `StallWatchdog.watched` (or use `busy()`); a monitor thread then
+  logs the stack of the offending thread while it's still stuck.
+
+>>> h = LagHistogram()
+>>> for ms in [0.3, 1.5, 3, 700]:
+...     h.add(ms)
+>>> h.count, h.percentile(50)
+(4, 2.0)
+"""
+
+import collections
+import functools
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets in milliseconds: 1, 2, 4, ..., 65536.
+# Everything later than that ends up in one last bucket.
+LAG_BUCKETS_MS = [2 ** i for i in range(17)]
+DEFAULT_STALL_THRESHOLD_S = 2.0
+DEFAULT_REPORT_INTERVAL_S = 300
+# How many captured stalls to keep around.
+MAX_STALLS = 20
+
+
+class LagHistogram:
+    """
+    Power-of-two histogram of lateness in milliseconds.  Early timers
+    (negative lateness) count as 0.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.count = 0
+        self.max_ms = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, lateness_ms):
+        lateness_ms = max(0.0, lateness_ms)
+        # Bucket i holds everything up to LAG_BUCKETS_MS[i].
+        index = 0 if lateness_ms <= 1 else min((math.ceil(lateness_ms) - 1).bit_length(), len(LAG_BUCKETS_MS))
+        with self.lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.max_ms = max(self.max_ms, lateness_ms)
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket that contains the `p`-th percentile.
+        `inf` if it's in the last bucket, `None` if there is no data.
+        """
+        with self.lock:
+            if not self.count:
+                return None
+            wanted = self.count * p / 100
+            seen = 0
+            for index, amount in enumerate(self.buckets):
+                seen += amount
+                if seen >= wanted:
+                    break
+        return float(LAG_BUCKETS_MS[index]) if index < len(LAG_BUCKETS_MS) else float('inf')
+
+    def reset(self):
+        with self.lock:
+            self.buckets = [0] * len(self.buckets)
+            self.count = 0
+            self.max_ms = 0.0
+
+    def summary(self):
+        if not self.count:
+            return 'no timers fired'
+        return '{} timers, p50 <= {} ms, p90 <= {} ms, p99 <= {} ms, max {:.0f} ms'.format(
+            self.count, self.percentile(50), self.percentile(90), self.percentile(99), self.max_ms)
+
+
+class LagReportingCallbacksMixin:
+    """
+    Implements `AbstractCallbacks.report_timer_lag` by feeding
+    `self.lag_histogram`.  Mix into your callbacks.  Don't also pass that
+    histogram as the scheduler's `on_lag`.
+    """
+
+    def report_timer_lag(self, game_id, lateness_ms):
+        self.lag_histogram.add(lateness_ms)
+
+
+class StallWatchdog:
+    def __init__(self, threshold_s=DEFAULT_STALL_THRESHOLD_S, histogram=None,
+                 report_interval_s=DEFAULT_REPORT_INTERVAL_S):
+        """
+        histogram: if set, its summary gets logged every `report_interval_s`.
+        """
+        self.threshold_s = threshold_s
+        self.histogram = histogram
+        self.report_interval_s = report_interval_s
+        # thread ident -> (start time, what) of the thing it's busy with
+        self.busy_since = dict()
+        # (thread ident, start time) pairs that were already reported
+        self.reported = set()
+        # (seconds stuck so far, what, formatted stack)
+        self.stalls = collections.deque(maxlen=MAX_STALLS)
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        assert self.thread is None
+        self.thread = threading.Thread(target=self._monitor, name='watchdog', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def busy(self, what=None):
+        """
+        Context manager: the current thread is busy with `what` until the
+        block ends.
+        """
+        return _Busy(self, what)
+
+    def watched(self, function):
+        """
+        Decorator for handlers, e.g. `CommandHandler('start', watchdog.watched(start))`.
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.busy(function.__name__):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def check(self, now=None):
+        """
+        Reports every thread that has been busy for too long.  The monitor
+        thread calls this regularly.  Returns the amount of new stalls.
+        """
+        if now is None:
+            now = time.monotonic()
+        frames = None
+        found = 0
+        for ident, (since, what) in list(self.busy_since.items()):
+            if now - since < self.threshold_s or (ident, since) in self.reported:
+                continue
+            if frames is None:
+                frames = sys._current_frames()
+            frame = frames.get(ident)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else '(no stack)\n'
+            self.reported.add((ident, since))
+            self.stalls.append((now - since, what, stack))
+            logger.warning('Stall: %s has been busy for %.1f s in:\n%s', what, now - since, stack)
+            found += 1
+        return found
+
+    def _monitor(self):
+        next_report = time.monotonic() + self.report_interval_s
+        while not self.stopping.wait(self.threshold_s / 2):
+            self.check()
+            if self.histogram is not None and time.monotonic() >= next_report:
+                logger.info('Timer lag: %s', self.histogram.summary())
+                next_report += self.report_interval_s
+
+
+class _Busy:
+    def __init__(self, watchdog, what):
+        self.watchdog = watchdog
+        self.what = what
+
+    def __enter__(self):
+        self.ident = threading.get_ident()
+        self.since = time.monotonic()
+        # Nested: the outer block is still busy once this one is done.
+        self.outer = self.watchdog.busy_since.get(self.ident)
+        if self.outer is None:
+            self.watchdog.busy_since[self.ident] = (self.since, self.what)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.outer is None:
+            self.watchdog.busy_since.pop(self.ident, None)
+            self.watchdog.reported.discard((self.ident, self.since))
+        return False